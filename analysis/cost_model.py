@@ -0,0 +1,316 @@
+from __future__ import annotations
+import argparse
+import sys
+from dataclasses import dataclass, fields
+import effects.effect_node as effect_node
+import effects.effects as effects
+import fighter.effect as effect
+import fighter.fighter_template as fighter_template
+import fighter.move as move
+import functions.bool_evaluation_set as bool_evaluation_set
+import functions.conditional_function as conditional_function
+import functions.expression as expression
+import functions.function_chain as function_chain
+import functions.function_node as function_node
+import functions.functions as functions
+
+# The cache reads (besides the inferred parameters) and writes of
+# every registered function.
+FUNCTION_COSTS = {
+    functions.set_cache: (0, 1),
+    functions.add: (0, 1),
+    functions.subtract: (0, 1),
+    functions.get_target_attribtue: (2, 1),
+    functions.compare: (1, 1),
+    functions.log: (1, 0)
+}
+
+# The cache reads (besides the inferred parameters) and writes of
+# every registered effect when it is called on its target.
+EFFECT_COSTS = {
+    effects.DamageTarget: (2, 1),
+    effects.HealSelf: (2, 1)
+}
+
+# Used for functions and effects that are not in the tables above.
+DEFAULT_COST = (1, 1)
+
+# The deepest nesting of lists and objects allowed in fighter JSON.
+# Compiling and costing a template recurse once or more per level, so
+# deeper content would raise RecursionError before a budget could
+# reject it. Real content nests about a dozen levels.
+MAX_NESTING = 100
+
+@dataclass(frozen = True, slots = True)
+class Cost:
+    """Cost represents the worst-case work of running part of a Fighter.
+
+    The worst case assumes every requirement passes, so every
+    function, requirement and effect in the graph runs once.
+
+    Attributes:
+        evaluations (int): The number of nodes called.
+        reads (int): The number of cache reads.
+        writes (int): The number of cache writes.
+        depth (int): The deepest nesting of nodes.
+    """
+    evaluations: int = 0
+    reads: int = 0
+    writes: int = 0
+    depth: int = 0
+
+    def __add__(self, other: Cost) -> Cost:
+        """Returns the cost of running both parts one after the other.
+        """
+        return Cost(
+            self.evaluations + other.evaluations,
+            self.reads + other.reads,
+            self.writes + other.writes,
+            max(self.depth, other.depth)
+        )
+
+    def nest(self) -> Cost:
+        """Returns the cost of a node that runs this cost as its children.
+        """
+        return Cost(self.evaluations + 1, self.reads, self.writes, self.depth + 1)
+
+    def worst(self, other: Cost) -> Cost:
+        """Returns the largest value of every field of both costs.
+        """
+        return Cost(*(max(getattr(self, field.name), getattr(other, field.name)) for field in fields(Cost)))
+
+@dataclass(frozen = True, slots = True)
+class FighterCost:
+    """FighterCost represents the worst-case costs of a FighterTemplate.
+
+    Attributes:
+        name (str): The name of the template.
+        moves (tuple[tuple[str, Cost]]): The name and cost of using
+        every move (requirement and effect), in order.
+        requirements (Cost): The cost of evaluating the requirement
+        of every move once (as when getting the available moves).
+        post_init (Cost): The cost of spawning a Fighter.
+    """
+    name: str
+    moves: tuple[tuple[str, Cost]]
+    requirements: Cost
+    post_init: Cost
+
+    @property
+    def turn(self) -> Cost:
+        """The cost of getting the available moves and using the most expensive one."""
+        worst = Cost()
+        for _, move_cost in self.moves:
+            worst = worst.worst(move_cost)
+
+        return self.requirements + worst
+
+@dataclass(frozen = True, slots = True)
+class CostBudget:
+    """CostBudget represents the most work allowed for a FighterTemplate.
+
+    Every limit applies to using any single move, to spawning a
+    Fighter and to a whole turn (see FighterCost.turn). A limit of
+    None is not checked.
+
+    Attributes:
+        evaluations (int | None): The most nodes called.
+        reads (int | None): The most cache reads.
+        writes (int | None): The most cache writes.
+        depth (int | None): The deepest nesting of nodes.
+    """
+    evaluations: int | None = None
+    reads: int | None = None
+    writes: int | None = None
+    depth: int | None = None
+
+    def exceeded(self, cost: Cost) -> list[str]:
+        """Returns a description of every limit the cost exceeds.
+
+        Args:
+            cost (Cost): The cost to check.
+
+        Returns:
+            One description per exceeded limit.
+        """
+        exceeded = []
+
+        for field in fields(CostBudget):
+            limit = getattr(self, field.name)
+            value = getattr(cost, field.name)
+
+            if limit is not None and value > limit:
+                exceeded.append(f'{field.name} {value} > {limit}')
+
+        return exceeded
+
+    def check(self, cost: Cost, description: str) -> None:
+        """Checks a cost against this budget.
+
+        Args:
+            cost (Cost): The cost to check.
+            description (str): What the cost is of (used in the error
+            message).
+
+        Raises:
+            ValueError: The cost exceeds a limit.
+        """
+        exceeded = self.exceeded(cost)
+        if exceeded:
+            raise ValueError(f'{description} exceeds the cost budget ({", ".join(exceeded)})')
+
+    def enforce(self, template: fighter_template.FighterTemplate) -> FighterCost:
+        """Checks every move, the post init and a turn of a template.
+
+        Args:
+            template (FighterTemplate): The template to check.
+
+        Raises:
+            ValueError: A cost exceeds a limit.
+
+        Returns:
+            The costs of the template.
+        """
+        costs = analyze(template)
+
+        for name, move_cost in costs.moves:
+            self.check(move_cost, f'Move \'{name}\' of \'{template.name}\'')
+
+        self.check(costs.post_init, f'Post init of \'{template.name}\'')
+        self.check(costs.turn, f'A turn of \'{template.name}\'')
+
+        return costs
+
+def analyze(template: fighter_template.FighterTemplate) -> FighterCost:
+    """Computes the worst-case costs of a FighterTemplate.
+
+    Args:
+        template (FighterTemplate): The template to analyze.
+
+    Raises:
+        ValueError: The template holds a node whose cost is unknown.
+
+    Returns:
+        The costs of the template.
+    """
+    requirements = Cost()
+    for template_move in template.moves:
+        requirements += node_cost(template_move.requirement)
+
+    return FighterCost(
+        template.name,
+        tuple((template_move.name, node_cost(template_move)) for template_move in template.moves),
+        requirements,
+        node_cost(template.post_init)
+    )
+
+def node_cost(node: callable) -> Cost:
+    """Computes the worst-case cost of calling a node once.
+
+    Args:
+        node (callable): A Move, Effect, EffectGroup, FunctionChain,
+        ConditionalFunction, BoolEvaluationSet, Expression or
+        FunctionNode.
+
+    Raises:
+        ValueError: The cost of the node is unknown.
+
+    Returns:
+        The cost of the node.
+    """
+    if isinstance(node, move.Move):
+        return (node_cost(node.requirement) + node_cost(node.effect)).nest()
+    if isinstance(node, effect.Effect):
+        return _sum(node.effects).nest()
+    if isinstance(node, effect.Effect.EffectGroup):
+        return _sum((node.pre_effect, node.main_effect, node.post_effect)).nest()
+    if isinstance(node, conditional_function.ConditionalFunction):
+        return _sum((node.requirement, node.function)).nest()
+    if isinstance(node, bool_evaluation_set.BoolEvaluationSet):
+        return _sum(node.evaluations).nest()
+    if isinstance(node, function_chain.FunctionChain):
+        return _sum(node.functions).nest()
+    if isinstance(node, expression.Expression):
+        return Cost(1, len(node.reads), 0 if node.key is None else 1, 1)
+    if isinstance(node, function_node.FunctionNode):
+        if isinstance(node.function, type) and issubclass(node.function, effect_node.EffectNode):
+            # The effect is created and then called on the target.
+            reads, writes = EFFECT_COSTS.get(node.function, DEFAULT_COST)
+            return Cost(2, len(node.inferred) + reads, writes, 1)
+
+        reads, writes = FUNCTION_COSTS.get(node.function, DEFAULT_COST)
+        return Cost(1, len(node.inferred) + reads, writes, 1)
+
+    raise ValueError(f'The cost of {type(node).__name__} is unknown')
+
+def check_nesting(data: any, description: str) -> None:
+    """Checks that fighter JSON is not nested deeper than MAX_NESTING.
+
+    The data is walked without recursion, so this is safe to call on
+    any JSON before it is compiled.
+
+    Args:
+        data (any): The JSON data to check.
+        description (str): What the data is of (used in the error
+        message).
+
+    Raises:
+        ValueError: The data is nested deeper than MAX_NESTING.
+    """
+    stack = [(data, 1)]
+
+    while stack:
+        value, depth = stack.pop()
+
+        if isinstance(value, dict):
+            value = value.values()
+        elif not isinstance(value, list):
+            continue
+
+        if depth > MAX_NESTING:
+            raise ValueError(f'{description} is nested deeper than {MAX_NESTING} levels')
+
+        stack.extend((child, depth + 1) for child in value)
+
+def _sum(nodes: tuple[callable]) -> Cost:
+    """Returns the cost of calling every node once.
+    """
+    total = Cost()
+    for node in nodes:
+        total += node_cost(node)
+
+    return total
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Prints the worst-case costs of fighter JSON files and checks them against a budget.')
+    parser.add_argument('paths', nargs = '+', help = 'the fighter JSON files')
+    for field in fields(CostBudget):
+        parser.add_argument(f'--{field.name}', type = int, help = f'the most {field.name} allowed')
+    arguments = parser.parse_args()
+
+    budget = CostBudget(**{field.name: getattr(arguments, field.name) for field in fields(CostBudget)})
+    failed = False
+
+    for path in arguments.paths:
+        try:
+            template = fighter_template.FighterTemplate.load_json(path)
+        except (OSError, ValueError) as error:
+            print(f'{path}\n    {error}')
+            failed = True
+            continue
+
+        costs = analyze(template)
+
+        print(f'{path} ({costs.name})')
+        for name, move_cost in costs.moves:
+            print(f'    move {name}: {move_cost}')
+        print(f'    post init: {costs.post_init}')
+        print(f'    turn: {costs.turn}')
+
+        try:
+            budget.enforce(template)
+        except ValueError as error:
+            print(f'    {error}')
+            failed = True
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,374 @@
+from __future__ import annotations
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+from dataclasses import dataclass
+import fighter.content_pack as content_pack
+import fighter.fighter as fighter
+import fighter.fighter_template as fighter_template
+import analysis.telemetry as telemetry
+
+# Cache keys that random content reads and writes.
+CONTENT_KEYS = ('k0', 'k1', 'k2', 'k3')
+READABLE_KEYS = CONTENT_KEYS + ('hp', 'max hp')
+WRITABLE_KEYS = CONTENT_KEYS + ('throwaway',)
+
+OPERATORS = ('>', '>=', '=', '<=', '<', '!=')
+EXPRESSION_OPERATORS = ('>', '>=', '==', '<=', '<', '!=')
+
+# Cache keys that hold objects (or the shared generator) rather than
+# content.
+IGNORED_KEYS = frozenset(('moves', 'targets', 'rng'))
+
+@dataclass(frozen = True, slots = True)
+class Trace:
+    """Trace represents everything observable about a scripted battle.
+
+    Attributes:
+        events (tuple[tuple]): One (turn, attacker name, move index,
+        first fighter's hp, second fighter's hp) tuple per turn.
+        states (tuple[tuple[tuple[str, str]]]): The final cache of
+        both fighters as sorted (key, repr(value)) pairs.
+        rng_state (tuple): The final state of the battle's random
+        generator.
+        error (str): The error that stopped the battle, or an empty
+        string.
+    """
+    events: tuple[tuple]
+    states: tuple[tuple[tuple[str, str]]]
+    rng_state: tuple
+    error: str = ''
+
+@dataclass(frozen = True, slots = True)
+class Mismatch:
+    """Mismatch represents an engine that did not match the reference.
+
+    Attributes:
+        case (int): The seed of the case (see random_case).
+        engine (str): The name of the engine.
+        field (str): The first Trace field that differs.
+        expected (any): The value of the field in the reference trace.
+        actual (any): The value of the field in the engine's trace.
+    """
+    case: int
+    engine: str
+    field: str
+    expected: any
+    actual: any
+
+def reference_engine(data1: dict[str, any], data2: dict[str, any], seed: int, script: list[int]) -> Trace:
+    """Runs a scripted battle with the plain interpreter.
+
+    Every turn, the attacker's available moves are found by calling
+    Move.is_ready on every move, the script picks one of them (its
+    entry modulo the number of available moves) and Fighter.attack
+    uses it.
+
+    Args:
+        data1 (dict[str, any]): The fighter JSON of the first fighter.
+        data2 (dict[str, any]): The fighter JSON of the second fighter.
+        seed (int): The seed of the battle.
+        script (list[int]): One entry per turn.
+
+    Returns:
+        The trace of the battle.
+    """
+    def pick(attacker: fighter.Fighter, entry: int) -> tuple[int, callable]:
+        available = [index for index, available_move in enumerate(attacker.moves) if available_move.is_ready(attacker.cache)]
+        index = available[entry % len(available)]
+
+        return index, lambda: attacker.attack(index, 0)
+
+    return _run(fighter_template.FighterTemplate.generate(data1), fighter_template.FighterTemplate.generate(data2), seed, script, pick)
+
+def mask_engine(data1: dict[str, any], data2: dict[str, any], seed: int, script: list[int]) -> Trace:
+    """Runs a scripted battle with the cached available moves mask.
+
+    Uses Fighter.get_available_moves_mask and Fighter.attack_available
+    (as simulation.battle.run_battle does).
+    """
+    return _run(fighter_template.FighterTemplate.generate(data1), fighter_template.FighterTemplate.generate(data2), seed, script, _mask_pick)
+
+def apply_moves_engine(data1: dict[str, any], data2: dict[str, any], seed: int, script: list[int]) -> Trace:
+    """Runs a scripted battle with Fighter.apply_moves.
+
+    Moves are picked from the mask and applied one command at a time
+    with Fighter.apply_moves.
+    """
+    def pick(attacker: fighter.Fighter, entry: int) -> tuple[int, callable]:
+        mask = attacker.get_available_moves_mask()
+        index = attacker.get_available_move_index(entry % mask.bit_count(), mask)
+
+        return index, lambda: fighter.Fighter.apply_moves([attacker], [(0, index, 0)])
+
+    return _run(fighter_template.FighterTemplate.generate(data1), fighter_template.FighterTemplate.generate(data2), seed, script, pick)
+
+def telemetry_engine(data1: dict[str, any], data2: dict[str, any], seed: int, script: list[int]) -> Trace:
+    """Runs a scripted battle with templates instrumented for telemetry.
+    """
+    counters = telemetry.Telemetry()
+
+    return _run(
+        fighter_template.FighterTemplate.generate(data1, counters = counters),
+        fighter_template.FighterTemplate.generate(data2, counters = counters),
+        seed,
+        script,
+        _mask_pick
+    )
+
+def content_pack_engine(data1: dict[str, any], data2: dict[str, any], seed: int, script: list[int]) -> Trace:
+    """Runs a scripted battle with templates loaded from a content pack.
+
+    Both fighters are bundled into a pack (sharing presets for the
+    moves they have in common) and loaded back from it.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for name, data in (('first', data1), ('second', data2)):
+            paths.append(os.path.join(directory, f'{name}.json'))
+            with open(paths[-1], 'w') as file:
+                json.dump(data, file)
+
+        content_pack.ContentPack.build(os.path.join(directory, 'content.pack'), paths)
+
+        with content_pack.ContentPack(os.path.join(directory, 'content.pack')) as pack:
+            template1 = pack.load('first')
+            template2 = pack.load('second')
+
+    return _run(template1, template2, seed, script, _mask_pick)
+
+ENGINES = {
+    'mask': mask_engine,
+    'apply moves': apply_moves_engine,
+    'telemetry': telemetry_engine,
+    'content pack': content_pack_engine
+}
+
+def random_case(case: int, turns: int = 200) -> tuple[dict[str, any], dict[str, any], int, list[int]]:
+    """Generates a random battle.
+
+    Args:
+        case (int): The seed of the case. The same seed always gives
+        the same case.
+        turns (int, optional): The length of the script. Defaults to
+        200.
+
+    Returns:
+        The fighter JSON of both fighters, the seed of the battle and
+        the script.
+    """
+    rng = random.Random(case)
+
+    data1 = random_fighter(rng, 'first')
+    data2 = random_fighter(rng, 'second')
+
+    # Shared moves make the content pack store presets.
+    if rng.random() < 0.5:
+        data2['moves'].append(rng.choice(data1['moves']))
+
+    return data1, data2, rng.getrandbits(32), [rng.getrandbits(16) for _ in range(turns)]
+
+def random_fighter(rng: random.Random, name: str, depth: int = 2) -> dict[str, any]:
+    """Generates valid fighter JSON with random moves and requirements.
+
+    The first move has no requirements, so there is always an
+    available move.
+
+    Args:
+        rng (random.Random): The random generator.
+        name (str): The name of the fighter.
+        depth (int, optional): How deep requirements may be nested.
+        Defaults to 2.
+
+    Returns:
+        The fighter JSON.
+    """
+    moves = []
+    for index in range(rng.randint(1, 3)):
+        moves.append({
+            'name': f'move {index}',
+            'effects': [_random_effect(rng, depth) for _ in range(rng.randint(1, 2))],
+            'requirements': _random_requirements(rng, depth) if index else []
+        })
+
+    return {
+        'name': name,
+        'presets': [],
+        'max health': rng.randint(30, 80),
+        'moves': moves,
+        'cache': {key: rng.randint(0, 10) for key in CONTENT_KEYS},
+        'post init': [_random_function(rng, depth) for _ in range(rng.randint(0, 2))]
+    }
+
+def check(engines: dict[str, callable] = None, cases: int = 100, first_case: int = 0, turns: int = 200) -> list[Mismatch]:
+    """Runs random battles through the reference and other engines.
+
+    Args:
+        engines (dict[str, callable], optional): The engines to check
+        by name. An engine takes the same arguments as
+        reference_engine and returns a Trace. Defaults to ENGINES.
+        cases (int, optional): The number of cases. Defaults to 100.
+        first_case (int, optional): The seed of the first case.
+        Defaults to 0.
+        turns (int, optional): The length of every script. Defaults
+        to 200.
+
+    Returns:
+        The first mismatch of every engine in every case.
+    """
+    engines = ENGINES if engines is None else engines
+    mismatches = []
+
+    for case in range(first_case, first_case + cases):
+        data1, data2, seed, script = random_case(case, turns)
+        expected = _traced(reference_engine, data1, data2, seed, script)
+
+        for name, engine in engines.items():
+            actual = _traced(engine, data1, data2, seed, script)
+
+            for field in Trace.__dataclass_fields__:
+                if getattr(expected, field) != getattr(actual, field):
+                    mismatches.append(Mismatch(case, name, field, getattr(expected, field), getattr(actual, field)))
+                    break
+
+    return mismatches
+
+def _run(template1: fighter_template.FighterTemplate, template2: fighter_template.FighterTemplate, seed: int, script: list[int], pick: callable) -> Trace:
+    """Runs a scripted battle where pick chooses and applies every move.
+    """
+    rng = random.Random(seed)
+    events = []
+    error = ''
+
+    fighter1 = template1.spawn(rng)
+    fighter2 = template2.spawn(rng)
+    fighter1.challenge_target(fighter2)
+    attacker = fighter1
+
+    try:
+        for turn, entry in enumerate(script):
+            if not fighter1.targets:
+                break
+
+            index, apply = pick(attacker, entry)
+            apply()
+
+            events.append((turn, attacker.cache['name'], index, fighter1.cache['hp'], fighter2.cache['hp']))
+            attacker = fighter2 if attacker is fighter1 else fighter1
+    except Exception as exception:
+        error = f'{type(exception).__name__}: {exception}'
+
+    return Trace(tuple(events), (_state(fighter1.cache), _state(fighter2.cache)), rng.getstate(), error)
+
+def _mask_pick(attacker: fighter.Fighter, entry: int) -> tuple[int, callable]:
+    """Picks a move from the available moves mask and applies it with attack_available.
+    """
+    mask = attacker.get_available_moves_mask()
+    available_index = entry % mask.bit_count()
+
+    return attacker.get_available_move_index(available_index, mask), lambda: attacker.attack_available(available_index, 0, mask)
+
+def _traced(engine: callable, data1: dict[str, any], data2: dict[str, any], seed: int, script: list[int]) -> Trace:
+    """Runs an engine without the output of log functions.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return engine(data1, data2, seed, script)
+
+def _state(cache: dict[str, any]) -> tuple[tuple[str, str]]:
+    """Returns the comparable part of a cache.
+    """
+    return tuple(sorted((key, repr(value)) for key, value in cache.items() if key not in IGNORED_KEYS))
+
+def _random_effect(rng: random.Random, depth: int) -> dict[str, any]:
+    """Generates a random effect group.
+    """
+    if rng.random() < 0.75:
+        min_damage = rng.randint(1, 8)
+        effect, literal = 'damage target', {'min_damage': min_damage, 'max_damage': min_damage + rng.randint(0, 6)}
+    else:
+        effect, literal = 'heal self', {'heal_amount': rng.randint(1, 10)}
+
+    return {
+        'effect': effect,
+        'inferred parameters': {},
+        'literal parameters': literal,
+        'pre effect': [_random_function(rng, depth) for _ in range(rng.randint(0, 3))],
+        'post effect': [_random_function(rng, depth) for _ in range(rng.randint(0, 2))],
+        # A main effect whose requirements fail returns None, which the
+        # EffectGroup then calls, so these are rare to keep most battles
+        # going.
+        'requirements': _random_requirements(rng, depth) if rng.random() < 0.05 else []
+    }
+
+def _random_function(rng: random.Random, depth: int) -> dict[str, any]:
+    """Generates a random function or expression.
+    """
+    requirements = _random_requirements(rng, depth - 1) if depth > 0 and rng.random() < 0.5 else []
+    kind = rng.randrange(5)
+
+    if kind == 0:
+        function, inferred, literal = 'set cache', {}, {'key': rng.choice(WRITABLE_KEYS), 'value': rng.randint(0, 10)}
+    elif kind == 1:
+        function = rng.choice(('add', 'subtract'))
+        inferred, literal = {'lhs': rng.choice(READABLE_KEYS)}, {'rhs': rng.randint(0, 3), 'key': rng.choice(WRITABLE_KEYS)}
+    elif kind == 2:
+        return _random_compare(rng, requirements)
+    elif kind == 3:
+        function = 'get target attribute'
+        inferred, literal = {'target_index': 'last hit'}, {'key': rng.choice(WRITABLE_KEYS), 'target_key': rng.choice(READABLE_KEYS)}
+    else:
+        entry = {'expr': f'{_name(rng.choice(READABLE_KEYS))} {rng.choice("+-")} {rng.randint(0, 3)}', 'key': rng.choice(WRITABLE_KEYS)}
+        if requirements:
+            entry['requirements'] = requirements
+        return entry
+
+    return {'function': function, 'inferred parameters': inferred, 'literal parameters': literal, 'requirements': requirements}
+
+def _random_requirements(rng: random.Random, depth: int) -> list[list[dict[str, any]]]:
+    """Generates random requirements.
+    """
+    requirements = []
+
+    for _ in range(rng.randint(0, 2)):
+        requirement_set = []
+        for _ in range(rng.randint(1, 2)):
+            nested = _random_requirements(rng, depth - 1) if depth > 0 and rng.random() < 0.3 else []
+
+            if rng.random() < 0.5:
+                requirement_set.append(_random_compare(rng, nested))
+            else:
+                requirement_set.append({'expr': f'{_name(rng.choice(READABLE_KEYS))} {rng.choice(EXPRESSION_OPERATORS)} {rng.randint(0, 10)}'})
+        requirements.append(requirement_set)
+
+    return requirements
+
+def _random_compare(rng: random.Random, requirements: list[list[dict[str, any]]]) -> dict[str, any]:
+    """Generates a random compare, which also writes its result to key.
+    """
+    return {
+        'function': 'compare',
+        'inferred parameters': {'lhs': rng.choice(READABLE_KEYS), 'rhs': rng.choice(READABLE_KEYS)},
+        'literal parameters': {'operator': rng.choice(OPERATORS), 'key': rng.choice(WRITABLE_KEYS)},
+        'requirements': requirements
+    }
+
+def _name(key: str) -> str:
+    """Returns the expression name of a cache key.
+    """
+    return key.replace(' ', '_')
+
+if __name__ == '__main__':
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    mismatches = check(cases = cases)
+
+    for mismatch in mismatches[:10]:
+        print(f'case {mismatch.case}, engine {mismatch.engine}: {mismatch.field} differs')
+        print(f'    expected: {mismatch.expected!r:.300}')
+        print(f'    actual:   {mismatch.actual!r:.300}')
+
+    print(f'{len(mismatches)} mismatches in {cases} cases')
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,456 @@
+from __future__ import annotations
+import random
+from collections import defaultdict
+from itertools import accumulate, repeat
+from dataclasses import dataclass
+import fighter.fighter as fighter
+import fighter.move as move
+
+IGNORED_KEYS = frozenset(('moves', 'targets', 'last hit', 'rng'))
+
+# The most outcomes a Move can branch into (one per combination of the
+# outcomes of its effect groups) before it is sampled instead.
+MAX_BRANCHES = 4096
+
+@dataclass(frozen = True, slots = True, eq = False)
+class MoveOutcome:
+    """MoveOutcome represents the distribution of hp changes of a Move.
+
+    Attributes:
+        outcomes (dict[tuple[int, int], float]): The probability of
+        every (hp lost by the target, hp gained by the caster) pair.
+        exact (bool): Whether the distribution was computed
+        analytically (True) or estimated by sampling (False).
+    """
+    outcomes: dict[tuple[int, int], float]
+    exact: bool
+
+    @property
+    def damage(self) -> dict[int, float]:
+        """The distribution of hp lost by the target."""
+        return _marginal(self.outcomes, 0)
+
+    @property
+    def healing(self) -> dict[int, float]:
+        """The distribution of hp gained by the caster."""
+        return _marginal(self.outcomes, 1)
+
+    @property
+    def expected_damage(self) -> float:
+        """The expected hp lost by the target."""
+        return sum(damage * probability for (damage, _), probability in self.outcomes.items())
+
+    @property
+    def expected_healing(self) -> float:
+        """The expected hp gained by the caster."""
+        return sum(healing * probability for (_, healing), probability in self.outcomes.items())
+
+class _RecordingCache(dict):
+    """A cache that remembers every key that was read from it.
+    """
+    def __init__(self, data: dict[str, any], reads: set[str]):
+        super(_RecordingCache, self).__init__(data)
+        self.reads: set[str] = reads
+
+    def __getitem__(self, key: str) -> any:
+        self.reads.add(key)
+        return super(_RecordingCache, self).__getitem__(key)
+
+class _TargetStub:
+    """Stands in for a target Fighter (only its cache is ever read).
+    """
+    __slots__ = ('cache',)
+
+    def __init__(self, cache: dict[str, any]):
+        self.cache: dict[str, any] = cache
+
+class MoveAnalyzer:
+    """MoveAnalyzer computes and caches the outcome distribution of Moves.
+
+    MoveAnalyzer runs the pre-effects, requirements and post-effects of
+    a Move on scratch copies of the caster and target caches (so that,
+    for example, a doubled damage cap is taken into account) and asks
+    every main effect for its exact distribution (see
+    EffectNode.outcomes). Every outcome of an effect group is applied
+    to its own copy of the scratch caches before the next group runs,
+    so later groups see the hp left by earlier ones. If an effect
+    cannot be computed analytically, or a Move has more than
+    MAX_BRANCHES outcomes, the whole Move is sampled instead.
+
+    Results are cached per Move, keyed by the values of the cache keys
+    that were read while analyzing it, so analyzing the same Move
+    again in a state that only differs in unrelated keys is a table
+    lookup.
+
+    Note:
+        Functions with side effects outside the cache (such as log)
+        still run while a Move is analyzed.
+
+    Attributes:
+        samples (int): The number of samples to take when a Move
+        cannot be computed analytically.
+        rng (random.Random): The random generator used for sampling.
+        tables (dict[Move, dict[tuple, dict[tuple, MoveOutcome]]]):
+        The cached outcomes, by Move, by the keys read (caster keys,
+        target keys), by the values of those keys.
+    """
+    def __init__(self, samples: int = 10000, seed: int = None):
+        """Initializes a MoveAnalyzer with empty tables.
+
+        Args:
+            samples (int, optional): The number of samples to take
+            when a Move cannot be computed analytically. Defaults to
+            10000.
+            seed (int, optional): The seed used for sampling.
+        """
+        self.samples: int = samples
+        self.rng: random.Random = random.Random(seed)
+        self.tables: dict[move.Move, dict[tuple, dict[tuple, MoveOutcome]]] = defaultdict(dict)
+
+    def analyze(self, analyzed_move: move.Move, caster: dict[str, any], target: dict[str, any]) -> MoveOutcome:
+        """Returns the outcome distribution of a Move.
+
+        Args:
+            analyzed_move (Move): The Move to analyze.
+            caster (dict[str, any]): The cache of the fighter using
+            the Move.
+            target (dict[str, any]): The cache of the target.
+
+        Raises:
+            PermissionError: The requirements for the Move are not
+            satisfied.
+
+        Returns:
+            The outcome distribution of the Move.
+        """
+        return self.__lookup(analyzed_move, caster, target)[0]
+
+    def analyze_fighter(self, analyzed_fighter: fighter.Fighter, target_index: int = 0) -> dict[str, MoveOutcome]:
+        """Returns the outcome distribution of every available Move.
+
+        Args:
+            analyzed_fighter (Fighter): The fighter using the Moves.
+            target_index (int, optional): The index of the target.
+            Defaults to 0.
+
+        Returns:
+            The outcome distribution of every available Move, by
+            name.
+        """
+        target = analyzed_fighter.targets[target_index].cache
+
+        return {
+            available_move.name: self.analyze(available_move, analyzed_fighter.cache, target)
+            for available_move in analyzed_fighter.get_possible_moves()
+        }
+
+    def win_probability(self, fighter1: fighter.Fighter, fighter2: fighter.Fighter, max_turns: int = 500, tolerance: float = 1e-12) -> tuple[float, float, float]:
+        """Estimates the outcome of a 1v1 battle by dynamic programming.
+
+        Propagates the probability of every (fighter1 hp, fighter2 hp)
+        state turn by turn, where fighter1 moves first and both
+        fighters pick uniformly between their available moves (as in
+        simulation.battle.run_battle). Every cache value other than
+        hp is assumed to stay the same throughout the battle.
+
+        States are kept in rows (every defender hp for one attacker
+        hp). When the moves available to the attacker and their
+        outcomes do not depend on the defender's hp, a whole row is
+        moved at once, and uniform damage ranges (such as
+        DamageTarget's) are applied with prefix sums instead of one
+        update per damage value.
+
+        Args:
+            fighter1 (Fighter): The fighter that moves first.
+            fighter2 (Fighter): The other fighter.
+            max_turns (int, optional): The number of turns after which
+            the battle is called a draw. Defaults to 500.
+            tolerance (float, optional): The probability below which
+            a state is dropped. Defaults to 1e-12.
+
+        Returns:
+            The probabilities that fighter1 wins, that fighter2 wins
+            and that there is no winner (within max_turns, or because
+            the state was dropped).
+        """
+        caches = (dict(fighter1.cache), dict(fighter2.cache))
+        rows = {caches[0]['hp']: {caches[1]['hp']: 1.0}}
+        wins = [0.0, 0.0]
+        transitions = ({}, {})
+
+        for turn in range(max_turns):
+            if not rows:
+                break
+
+            attacker = turn % 2
+            defender = 1 - attacker
+            next_rows = defaultdict(lambda: defaultdict(float))
+
+            for attacker_hp, row in rows.items():
+                if tolerance:
+                    row = {defender_hp: probability for defender_hp, probability in row.items() if probability >= tolerance}
+
+                transition = transitions[attacker].get(attacker_hp)
+                if transition is None or transition is _DEPENDENT:
+                    groups = self.__group(row, attacker_hp, caches[attacker], caches[defender], transitions[attacker])
+                else:
+                    groups = [(transition, row)]
+
+                for transition, states in groups:
+                    for healing, kernel, uniform in transition:
+                        moved, won = _apply(states, kernel, uniform)
+                        wins[attacker] += won
+
+                        for defender_hp, probability in moved.items():
+                            next_rows[defender_hp][attacker_hp + healing] += probability
+
+            rows = next_rows
+
+        return wins[0], wins[1], 1 - wins[0] - wins[1]
+
+    def __group(self, row: dict[int, float], attacker_hp: int, attacker: dict[str, any], defender: dict[str, any], transitions: dict) -> list[tuple[tuple, dict[int, float]]]:
+        """Groups the states of a row by the transition they go through.
+
+        Transitions are cached by attacker hp, or by (attacker hp,
+        defender hp) once a transition is found to depend on the
+        defender's hp.
+
+        Returns:
+            Every transition and the states going through it.
+        """
+        groups = {}
+        shared = transitions.get(attacker_hp)
+
+        for defender_hp, probability in row.items():
+            if shared is not None and shared is not _DEPENDENT:
+                transition = shared
+            else:
+                transition = transitions.get((attacker_hp, defender_hp))
+
+            if transition is None:
+                caster = attacker | {'hp': attacker_hp}
+                target = defender | {'hp': defender_hp}
+                transition, dependent = self.__transition(caster, target)
+
+                if dependent or shared is _DEPENDENT:
+                    shared = transitions[attacker_hp] = _DEPENDENT
+                    transitions[(attacker_hp, defender_hp)] = transition
+                else:
+                    shared = transitions[attacker_hp] = transition
+
+            groups.setdefault(id(transition), (transition, {}))[1][defender_hp] = probability
+
+        return list(groups.values())
+
+    def __lookup(self, analyzed_move: move.Move, caster: dict[str, any], target: dict[str, any]) -> tuple[MoveOutcome, tuple[str]]:
+        """Returns the outcome of a Move and the target keys it depends on.
+
+        Returns:
+            The outcome distribution of the Move and the keys of the
+            target cache that were read to compute it.
+        """
+        table = self.tables[analyzed_move]
+
+        for (caster_keys, target_keys), outcomes in table.items():
+            values = _values(caster, caster_keys, target, target_keys)
+            if values is not None and values in outcomes:
+                return outcomes[values], target_keys
+
+        caster_reads, target_reads = set(), set()
+        scratch_caster, scratch_target = self.__scratch(caster, target, caster_reads, target_reads)
+
+        if not analyzed_move.is_ready(scratch_caster):
+            raise PermissionError("The requirements for this Move are not satisfied.")
+
+        outcome = self.__compute(analyzed_move, scratch_caster, scratch_target)
+
+        caster_keys = tuple(sorted(caster_reads - IGNORED_KEYS))
+        target_keys = tuple(sorted(target_reads))
+        values = _values(caster, caster_keys, target, target_keys)
+
+        if values is not None:
+            table.setdefault((caster_keys, target_keys), {})[values] = outcome
+
+        return outcome, target_keys
+
+    def __transition(self, caster: dict[str, any], target: dict[str, any]) -> tuple[tuple, bool]:
+        """Returns what can happen when the caster picks a random move.
+
+        Returns:
+            A tuple of (hp gained by the caster, distribution of hp
+            lost by the target, uniform damage range or None) and
+            whether any of it depends on the target's hp.
+        """
+        target_reads = set()
+        scratch_caster, _ = self.__scratch(caster, target, set(), target_reads)
+        moves = [candidate for candidate in caster['moves'] if candidate.is_ready(scratch_caster)]
+        dependent = 'hp' in target_reads
+        merged = defaultdict(lambda: defaultdict(float))
+
+        for chosen_move in moves:
+            outcome, target_keys = self.__lookup(chosen_move, caster, target)
+            dependent = dependent or 'hp' in target_keys
+
+            for (damage, healing), probability in outcome.outcomes.items():
+                merged[healing][damage] += probability / len(moves)
+
+        return tuple((healing, dict(kernel), _uniform(kernel)) for healing, kernel in merged.items()), dependent
+
+    def __scratch(self, caster: dict[str, any], target: dict[str, any], caster_reads: set[str], target_reads: set[str]) -> tuple[_RecordingCache, _RecordingCache]:
+        """Creates recording copies of the caster and target caches.
+
+        Returns:
+            The scratch caster and target caches.
+        """
+        scratch_target = _RecordingCache(target, target_reads)
+        scratch_caster = _RecordingCache(caster, caster_reads)
+        scratch_caster['targets'] = [_TargetStub(scratch_target)]
+        scratch_caster['last hit'] = 0
+
+        return scratch_caster, scratch_target
+
+    def __compute(self, analyzed_move: move.Move, caster: dict[str, any], target: dict[str, any]) -> MoveOutcome:
+        """Computes the outcome distribution of a Move on scratch caches.
+
+        Returns:
+            The outcome distribution of the Move.
+        """
+        # The effect groups change the scratch caches, so sampling (if
+        # an effect cannot be computed) has to start from a copy taken
+        # before any of them ran.
+        original_caster, original_target = dict(caster), dict(target)
+        branches = [(caster, target, 1.0)]
+
+        for group in analyzed_move.effect.effects:
+            next_branches = []
+
+            for branch_caster, branch_target, probability in branches:
+                group.pre_effect(branch_caster)
+                node = group.main_effect(branch_caster)
+                group_outcomes = node.outcomes(branch_target) if node is not None else {(0, 0): 1.0}
+
+                if group_outcomes is None:
+                    return self.__sample(analyzed_move, original_caster, original_target)
+
+                for (damage, healing), group_probability in group_outcomes.items():
+                    next_caster, next_target = _branch(branch_caster, branch_target)
+                    next_target['hp'] = _hp(next_target) - damage
+                    next_caster['hp'] = _hp(next_caster) + healing
+                    group.post_effect(next_caster)
+                    next_branches.append((next_caster, next_target, probability * group_probability))
+
+            if len(next_branches) > MAX_BRANCHES:
+                return self.__sample(analyzed_move, original_caster, original_target)
+
+            branches = next_branches
+
+        outcomes = defaultdict(float)
+        for branch_caster, branch_target, probability in branches:
+            outcomes[(original_target['hp'] - _hp(branch_target), _hp(branch_caster) - original_caster['hp'])] += probability
+
+        return MoveOutcome(dict(outcomes), True)
+
+    def __sample(self, analyzed_move: move.Move, caster: dict[str, any], target: dict[str, any]) -> MoveOutcome:
+        """Estimates the outcome distribution of a Move by sampling.
+
+        Returns:
+            The estimated outcome distribution of the Move.
+        """
+        counts = defaultdict(int)
+
+        for _ in range(self.samples):
+            sample_caster, sample_target = self.__scratch(caster, target, set(), set())
+            sample_caster['rng'] = self.rng
+            analyzed_move.effect(sample_caster, sample_target)
+            counts[(target['hp'] - sample_target['hp'], sample_caster['hp'] - caster['hp'])] += 1
+
+        return MoveOutcome({outcome: count / self.samples for outcome, count in counts.items()}, False)
+
+_DEPENDENT = object()
+
+def _uniform(kernel: dict[int, float]) -> tuple[int, int, float] | None:
+    """Returns (lowest, highest, probability) if a kernel is a uniform range.
+    """
+    probabilities = set(kernel.values())
+    low, high = min(kernel), max(kernel)
+
+    if len(probabilities) == 1 and high - low + 1 == len(kernel):
+        return low, high, probabilities.pop()
+    return None
+
+def _apply(row: dict[int, float], kernel: dict[int, float], uniform: tuple[int, int, float] | None) -> tuple[dict[int, float], float]:
+    """Applies a damage distribution to every defender hp of a row.
+
+    Returns:
+        The probability of every defender hp that survives and the
+        total probability of the defender dying.
+    """
+    moved = defaultdict(float)
+    won = 0.0
+
+    if not row:
+        return moved, won
+
+    if uniform is None or len(kernel) < 4:
+        for defender_hp, probability in row.items():
+            for damage, damage_probability in kernel.items():
+                if defender_hp <= damage:
+                    won += probability * damage_probability
+                else:
+                    moved[defender_hp - damage] += probability * damage_probability
+        return moved, won
+
+    low, high, damage_probability = uniform
+    first, last = max(1, min(row) - high), max(row) - low + 1
+
+    # The defender ends at hp - damage, so every surviving hp sums a
+    # window of the row (the hps that are low to high above it).
+    start = first + low
+    width = high - low + 1
+    prefix = [0.0, *accumulate(map(row.get, range(start, last + high + 1), repeat(0.0)))]
+
+    for remaining, window_end, window_start in zip(range(first, last), prefix[width:], prefix):
+        if window_end != window_start:
+            moved[remaining] = (window_end - window_start) * damage_probability
+
+    for defender_hp, probability in row.items():
+        if defender_hp <= high:
+            won += probability * damage_probability * (high - max(low, defender_hp) + 1)
+
+    return moved, won
+
+def _values(caster: dict[str, any], caster_keys: tuple[str], target: dict[str, any], target_keys: tuple[str]) -> tuple | None:
+    """Returns the values of the given keys, or None if any is unhashable.
+    """
+    values = (tuple(caster.get(key) for key in caster_keys), tuple(target.get(key) for key in target_keys))
+
+    try:
+        hash(values)
+    except TypeError:
+        return None
+
+    return values
+
+def _branch(caster: _RecordingCache, target: _RecordingCache) -> tuple[_RecordingCache, _RecordingCache]:
+    """Copies scratch caches (reads of the copies are still recorded).
+    """
+    branch_target = _RecordingCache(target, target.reads)
+    branch_caster = _RecordingCache(caster, caster.reads)
+    branch_caster['targets'] = [_TargetStub(branch_target)]
+
+    return branch_caster, branch_target
+
+def _hp(cache: dict[str, any]) -> int:
+    """Returns the hp of a scratch cache without recording the read.
+    """
+    return dict.__getitem__(cache, 'hp')
+
+def _marginal(outcomes: dict[tuple[int, int], float], index: int) -> dict[int, float]:
+    """Returns the distribution of one side of an outcome pair.
+    """
+    result = defaultdict(float)
+
+    for outcome, probability in outcomes.items():
+        result[outcome[index]] += probability
+
+    return dict(result)
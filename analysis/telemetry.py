@@ -0,0 +1,291 @@
+from __future__ import annotations
+import dataclasses
+import os
+import threading
+from array import array
+import fighter.effect as effect
+import fighter.move as move
+import functions.bool_evaluation_set as bool_evaluation_set
+import functions.conditional_function as conditional_function
+import functions.function_chain as function_chain
+
+# The Prometheus metric and help text of every kind of counter.
+METRICS = {
+    'move_uses': 'Times a move was used.',
+    'function_calls': 'Times a conditional function was called.',
+    'function_fires': 'Times a conditional function passed its requirements and ran.',
+    'requirement_evaluations': 'Times a requirement was evaluated.',
+    'requirement_passes': 'Times a requirement was satisfied.'
+}
+
+METRIC_PREFIX = 'fighter_'
+
+class TemplateCounters:
+    """TemplateCounters holds the telemetry counters of a single template.
+
+    Every instrumented node of the template holds a reference to
+    values and the index of its own counters, and increments them in
+    place, so counting an event never allocates.
+
+    Attributes:
+        labels (list[tuple[str, str]]): The (metric, node) of every
+        counter, where node is the path of the node in the fighter
+        JSON (such as 'Hit/effects/0/pre effect/1').
+        values (array): The value of every counter.
+    """
+    __slots__ = ('labels', 'values')
+
+    def __init__(self):
+        """Initializes a TemplateCounters with no counters.
+        """
+        self.labels: list[tuple[str, str]] = []
+        self.values: array = array('Q')
+
+    def add(self, *labels: tuple[str, str]) -> int:
+        """Adds consecutive counters.
+
+        Args:
+            labels (tuple[tuple[str, str]]): The (metric, node) of
+            every counter to add.
+
+        Returns:
+            The index of the first added counter.
+        """
+        index = len(self.values)
+
+        self.labels.extend(labels)
+        self.values.extend([0] * len(labels))
+
+        return index
+
+class Telemetry:
+    """Telemetry counts how often the moves and requirements of templates run.
+
+    Templates are instrumented when they are generated (pass a
+    Telemetry to FighterTemplate.generate or load_json). Instrumented
+    moves count their uses, conditional functions count their calls
+    and the times their requirements passed, and requirements count
+    their evaluations and the times they were satisfied. The counts
+    are kept per process; worker processes send snapshots (see
+    drain) that are merged into a single Telemetry, which can then be
+    reported or written as a Prometheus text file.
+
+    Note:
+        Counters are incremented without a lock, so battles running on
+        several threads at once may lose a few counts.
+
+    Attributes:
+        templates (dict[str, TemplateCounters]): The counters of every
+        instrumented template, by template name. Template names must
+        be unique within a Telemetry.
+    """
+    def __init__(self):
+        """Initializes a Telemetry with no templates.
+        """
+        self.templates: dict[str, TemplateCounters] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def instrument(self, name: str, moves: tuple[move.Move], post_init: function_chain.FunctionChain) -> tuple[tuple[move.Move], function_chain.FunctionChain]:
+        """Returns copies of the moves and post init of a template with counters.
+
+        The given moves and post init are not changed (they may be
+        shared with other templates, such as presets). Every node that
+        gets counters is copied, along with everything that holds it.
+        FighterTemplate.generate calls this before creating the
+        template.
+
+        Args:
+            name (str): The name of the template.
+            moves (tuple[Move]): The moves of the template.
+            post_init (FunctionChain): The post init of the template.
+
+        Raises:
+            ValueError: A template with this name was already
+            instrumented.
+
+        Returns:
+            The instrumented moves and post init.
+        """
+        with self.__lock:
+            if name in self.templates:
+                raise ValueError(f'A template named \'{name}\' was already instrumented')
+
+            counters = TemplateCounters()
+            indices = [counters.add(('move_uses', template_move.name)) for template_move in moves]
+            moves = tuple(
+                dataclasses.replace(
+                    template_move,
+                    requirement = _instrument(template_move.requirement, f'{template_move.name}/requirements', counters),
+                    effect = _instrument(template_move.effect, f'{template_move.name}/effects', counters),
+                    counters = counters.values,
+                    counter = index
+                ) for template_move, index in zip(moves, indices)
+            )
+            post_init = _instrument(post_init, 'post init', counters)
+
+            self.templates[name] = counters
+
+        return moves, post_init
+
+    def drain(self) -> dict[str, tuple[tuple[tuple[str, str]], bytes]]:
+        """Returns the counts so far and sets every counter back to 0.
+
+        Worker processes call this periodically and send the result
+        to the process that aggregates the counts (see merge).
+
+        Returns:
+            The labels and the bytes of the values of every template,
+            by template name.
+        """
+        snapshot = {}
+
+        with self.__lock:
+            for name, counters in self.templates.items():
+                values = counters.values
+                snapshot[name] = (tuple(counters.labels), values.tobytes())
+
+                for index in range(len(values)):
+                    values[index] = 0
+
+        return snapshot
+
+    def merge(self, snapshot: dict[str, tuple[tuple[tuple[str, str]], bytes]]) -> None:
+        """Adds the counts of a snapshot (see drain) to this Telemetry.
+
+        Args:
+            snapshot (dict[str, tuple[tuple[tuple[str, str]], bytes]]):
+            The snapshot to add.
+        """
+        with self.__lock:
+            for name, (labels, data) in snapshot.items():
+                counters = self.templates.get(name)
+                if counters is None:
+                    counters = self.templates[name] = TemplateCounters()
+                    counters.add(*labels)
+
+                if len(labels) != len(counters.labels):
+                    raise ValueError(f'The counters of \'{name}\' do not match the snapshot')
+
+                values = array('Q')
+                values.frombytes(data)
+
+                for index, value in enumerate(values):
+                    counters.values[index] += value
+
+    def counts(self) -> list[tuple[str, str, str, int]]:
+        """Returns every count.
+
+        Returns:
+            One (template, metric, node, value) tuple per counter.
+        """
+        with self.__lock:
+            return [
+                (name, metric, node, value)
+                for name, counters in self.templates.items()
+                for (metric, node), value in zip(counters.labels, counters.values)
+            ]
+
+    def report(self) -> str:
+        """Returns a human readable report of every count.
+
+        Moves that were never used and requirements that never passed
+        are marked, since they point to dead content.
+
+        Returns:
+            The report.
+        """
+        lines = []
+        current = None
+
+        for name, metric, node, value in self.counts():
+            if name != current:
+                lines.append(name)
+                current = name
+
+            marker = '  (never)' if value == 0 and metric in ('move_uses', 'function_fires', 'requirement_passes') else ''
+            lines.append(f'    {metric:<24} {value:>12}  {node}{marker}')
+
+        return '\n'.join(lines)
+
+    def prometheus(self) -> str:
+        """Returns every count in the Prometheus text format.
+
+        Returns:
+            The counts as Prometheus counters.
+        """
+        counts = self.counts()
+        lines = []
+
+        for metric, description in METRICS.items():
+            lines.append(f'# HELP {METRIC_PREFIX}{metric}_total {description}')
+            lines.append(f'# TYPE {METRIC_PREFIX}{metric}_total counter')
+
+            for name, count_metric, node, value in counts:
+                if count_metric == metric:
+                    lines.append(f'{METRIC_PREFIX}{metric}_total{{template="{_escape(name)}",node="{_escape(node)}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """Writes every count to a Prometheus text file.
+
+        The file is written next to path and then renamed, so a
+        collector reading it never sees a partial file.
+
+        Args:
+            path (str): The path of the file (for example in the
+            node exporter's textfile collector directory).
+        """
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+
+        with open(temporary_path, 'w') as file:
+            file.write(self.prometheus())
+
+        os.replace(temporary_path, path)
+
+def _instrument(node: callable, path: str, counters: TemplateCounters) -> callable:
+    """Returns a copy of a node and everything inside it with counters.
+
+    Nodes that never get counters (and hold none) are not copied.
+    """
+    if isinstance(node, effect.Effect):
+        return effect.Effect(*(
+            dataclasses.replace(
+                group,
+                pre_effect = _instrument(group.pre_effect, f'{path}/{index}/pre effect', counters),
+                main_effect = _instrument(group.main_effect, f'{path}/{index}/effect', counters),
+                post_effect = _instrument(group.post_effect, f'{path}/{index}/post effect', counters)
+            ) for index, group in enumerate(node.effects)
+        ))
+    if isinstance(node, function_chain.FunctionChain):
+        return function_chain.FunctionChain(*(
+            _instrument(function, f'{path}/{index}', counters) for index, function in enumerate(node.functions)
+        ))
+    if isinstance(node, conditional_function.ConditionalFunction):
+        counter = counters.add(('function_calls', path), ('function_fires', path))
+        instrumented = conditional_function.ConditionalFunction(
+            node.function,
+            _instrument(node.requirement, f'{path}/requirements', counters)
+        )
+        instrumented.counters = counters.values
+        instrumented.counter = counter
+        return instrumented
+    if isinstance(node, bool_evaluation_set.BoolEvaluationSet):
+        # Empty requirements always pass and are not worth counting.
+        if not node.evaluations:
+            return node
+
+        counter = counters.add(('requirement_evaluations', path), ('requirement_passes', path))
+        instrumented = bool_evaluation_set.BoolEvaluationSet(node.eval_type, *(
+            _instrument(evaluation, f'{path}/{index}', counters) for index, evaluation in enumerate(node.evaluations)
+        ))
+        instrumented.counters = counters.values
+        instrumented.counter = counter
+        return instrumented
+
+    return node
+
+def _escape(value: str) -> str:
+    """Escapes a Prometheus label value.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -9,6 +9,8 @@ class EffectNode(ABC):
         cache (dict[str, any]): The data that this EffectNode was 
         initialized with.
     """
+    __slots__ = ('cache',)
+
     def __init__(self, cache: dict[str, any]):
         """Initialzes an EffectNode with the given cache data.
 
@@ -28,4 +30,21 @@ class EffectNode(ABC):
         Raises:
             NotImplemented: This method was not overridden.
         """
-        raise NotImplemented()
\ No newline at end of file
+        raise NotImplemented()
+
+    def outcomes(self, target: dict[str, any]) -> dict[tuple[int, int], float] | None:
+        """Returns the exact distribution of hp changes of this effect.
+
+        This method can be overridden by effects whose outcome can be
+        computed without running them. It is used by analysis tools
+        and must not modify either cache.
+
+        Args:
+            target (dict[str, any]): The target of this effect.
+
+        Returns:
+            The probability of every (hp lost by the target, hp 
+            gained by the caster) pair, or None if the distribution 
+            cannot be computed analytically.
+        """
+        return None
@@ -1,4 +1,3 @@
-from random import randint
 import effects.effect_node as effect_node
 
 class DamageTarget(effect_node.EffectNode):
@@ -11,7 +10,8 @@ class DamageTarget(effect_node.EffectNode):
         self.min_damage (int): The least amount of health to remove.
         self.max_damage (int): The most amount of health to remove.
     """
-    
+    __slots__ = ('min_damage', 'max_damage')
+
     def __init__(self, cache: dict[str, any], min_damage: int, max_damage: int):
         """Initializes a DamageTarget with the given min and max damage.
 
@@ -28,11 +28,27 @@ class DamageTarget(effect_node.EffectNode):
     def __call__(self, target: dict[str, any]) -> None:
         """Removes a randomly generated amount of hp from the target.
 
+        The amount is drawn from the caster's random generator (the
+        reserved 'rng' cache key).
+
         Args:
             target (dict[str, any]): The target cache/data to remove
             hp from.
         """
-        target['hp'] -= randint(self.min_damage, self.max_damage)
+        target['hp'] -= self.cache['rng'].randint(self.min_damage, self.max_damage)
+
+    def outcomes(self, target: dict[str, any]) -> dict[tuple[int, int], float]:
+        """Returns the uniform distribution of damage dealt.
+
+        Args:
+            target (dict[str, any]): The target of this effect.
+
+        Returns:
+            The probability of every (hp lost by the target, hp 
+            gained by the caster) pair.
+        """
+        probability = 1 / (self.max_damage - self.min_damage + 1)
+        return {(damage, 0): probability for damage in range(self.min_damage, self.max_damage + 1)}
 
 class HealSelf(effect_node.EffectNode):
     """HealSelf represents a basic effect/move that increases user hp.
@@ -42,6 +58,7 @@ class HealSelf(effect_node.EffectNode):
         not heal beyond their max hp; no error is thrown if this 
         occurs)
     """
+    __slots__ = ('heal_amount',)
 
     def __init__(self, cache: dict[str, any], heal_amount: int):
         """Initializes a HealSelf with the given min and heal amount.
@@ -71,6 +88,18 @@ class HealSelf(effect_node.EffectNode):
         print(id(self.cache))
         self.cache['hp'] = min(self.cache['hp'] + self.heal_amount, self.cache['max hp'])
 
+    def outcomes(self, target: dict[str, any]) -> dict[tuple[int, int], float]:
+        """Returns the (certain) amount healed.
+
+        Args:
+            target (dict[str, any]): This parameter is meaningless.
+
+        Returns:
+            The probability of every (hp lost by the target, hp 
+            gained by the caster) pair.
+        """
+        return {(0, min(self.cache['hp'] + self.heal_amount, self.cache['max hp']) - self.cache['hp']): 1.0}
+
 EFFECTS = {
     "damage target": DamageTarget,
     "heal self": HealSelf
@@ -0,0 +1,234 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sys
+import threading
+import zipfile
+from collections import Counter
+import fighter.fighter_template as fighter_template
+import fighter.move as move
+import analysis.cost_model as cost_model
+import analysis.telemetry as telemetry
+
+INDEX_NAME = 'index.json'
+FORMAT_VERSION = 1
+
+class ContentPack:
+    """ContentPack loads FighterTemplates from a single bundled file.
+
+    A content pack is a zip file holding an index (index.json), one
+    JSON file per monster and one JSON file per preset. A preset is a
+    move definition shared by several monsters: a monster lists the
+    presets it uses in its "presets" field and writes {"preset": name}
+    in place of the move (see FighterTemplate.generate). Files are
+    read straight from the pack, and every preset is compiled once
+    and shared by every template that uses it (templates loaded with
+    counters get an instrumented copy of it).
+
+    Attributes:
+        path (str): The path to the pack.
+        monsters (dict[str, str]): The pack member of every monster,
+        by name (the file name without the .json extension).
+        preset_files (dict[str, str]): The pack member of every
+        preset, by preset name.
+        presets (dict[str, Move]): The presets compiled so far, by
+        preset name.
+        budget (CostBudget | None): The budget every template must fit
+        in (see analysis.cost_model).
+        counters (Telemetry | None): The telemetry to count the moves
+        and requirements of the templates in.
+    """
+    def __init__(self, path: str, budget: cost_model.CostBudget = None, counters: telemetry.Telemetry = None):
+        """Opens a content pack and reads its index.
+
+        Args:
+            path (str): The path to the pack.
+            budget (CostBudget, optional): The budget every template
+            must fit in.
+            counters (Telemetry, optional): The telemetry to count the
+            moves and requirements of the templates in.
+
+        Raises:
+            ValueError: The pack has an unsupported format version.
+        """
+        self.path: str = path
+        self.budget: cost_model.CostBudget | None = budget
+        self.counters: telemetry.Telemetry | None = counters
+        self.presets: dict[str, move.Move] = {}
+        self.__file: zipfile.ZipFile = zipfile.ZipFile(path, 'r')
+        self.__lock: threading.Lock = threading.Lock()
+
+        index = self.__read(INDEX_NAME)
+        if index.get('version') != FORMAT_VERSION:
+            self.__file.close()
+            raise ValueError(f'Unsupported content pack version {index.get("version")} (expected {FORMAT_VERSION})')
+
+        self.monsters: dict[str, str] = index['monsters']
+        self.preset_files: dict[str, str] = index['presets']
+
+    def __enter__(self) -> ContentPack:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.monsters
+
+    def close(self) -> None:
+        """Closes the pack file.
+        """
+        self.__file.close()
+
+    def load(self, name: str) -> fighter_template.FighterTemplate:
+        """Compiles the template of a monster.
+
+        Args:
+            name (str): The name of the monster.
+
+        Raises:
+            ValueError: The template uses an unknown preset, exceeds
+            the budget, or was already loaded with the same counters.
+
+        Returns:
+            The compiled FighterTemplate.
+        """
+        data = self.__read(self.monsters[name])
+        used = [move_params['preset'] for move_params in data['moves'] if 'preset' in move_params]
+
+        presets = {preset: self.preset(preset) for preset in used}
+
+        return fighter_template.FighterTemplate.generate(data, self.budget, self.counters, presets)
+
+    def load_all(self) -> dict[str, fighter_template.FighterTemplate]:
+        """Compiles the template of every monster.
+
+        Returns:
+            The compiled FighterTemplates, by name.
+        """
+        return {name: self.load(name) for name in self.monsters}
+
+    def preset(self, name: str) -> move.Move:
+        """Returns a preset, compiling it the first time it is used.
+
+        Args:
+            name (str): The name of the preset.
+
+        Raises:
+            ValueError: There is no preset with this name.
+
+        Returns:
+            The compiled preset.
+        """
+        compiled = self.presets.get(name)
+        if compiled is None:
+            compiled = self.presets.setdefault(name, self.__compile(name))
+
+        return compiled
+
+    def __compile(self, name: str) -> move.Move:
+        """Compiles a preset from the pack.
+        """
+        if name not in self.preset_files:
+            raise ValueError(f'Unknown preset \'{name}\'')
+
+        move_params = self.__read(self.preset_files[name])
+        cost_model.check_nesting(move_params, f'Preset \'{name}\'')
+
+        return move.Move.generate(move_params['name'], move_params['effects'], move_params['requirements'])
+
+    def __read(self, member: str) -> any:
+        """Reads and parses a JSON member of the pack.
+        """
+        with self.__lock, self.__file.open(member) as file:
+            try:
+                return json.load(file)
+            except RecursionError:
+                raise ValueError(f'{member} is nested too deeply to parse') from None
+
+    @staticmethod
+    def build(path: str, monster_paths: list[str], presets: dict[str, dict[str, any]] = None) -> None:
+        """Bundles fighter JSON files into a content pack.
+
+        Moves that are defined identically by more than one monster
+        are stored once as a preset, and the monsters refer to it.
+
+        Args:
+            path (str): The path to write the pack to.
+            monster_paths (list[str]): The fighter JSON files. The name
+            of a monster is its file name without the .json extension.
+            presets (dict[str, dict[str, any]], optional): Presets that
+            the monsters already refer to, by name.
+
+        Raises:
+            ValueError: Two monster files have the same name.
+        """
+        monsters = {}
+        for monster_path in monster_paths:
+            name = os.path.splitext(os.path.basename(monster_path))[0]
+            if name in monsters:
+                raise ValueError(f'More than one monster is named \'{name}\'')
+
+            with open(monster_path, 'r') as file:
+                monsters[name] = json.load(file)
+
+        presets = dict(presets or {})
+        shared = {}
+        counts = Counter(
+            _canonical(move_params)
+            for data in monsters.values()
+            for move_params in data['moves'] if 'preset' not in move_params
+        )
+
+        for data in monsters.values():
+            used = list(data.get('presets', ()))
+
+            for index, move_params in enumerate(data['moves']):
+                if 'preset' in move_params:
+                    continue
+
+                canonical = _canonical(move_params)
+                if counts[canonical] < 2:
+                    continue
+
+                preset = shared.get(canonical)
+                if preset is None:
+                    preset = shared[canonical] = f'{move_params["name"]}-{hashlib.sha1(canonical.encode()).hexdigest()[:8]}'
+                    presets[preset] = move_params
+
+                data['moves'][index] = {'preset': preset}
+                if preset not in used:
+                    used.append(preset)
+
+            data['presets'] = used
+
+        index = {
+            'version': FORMAT_VERSION,
+            'monsters': {name: f'monsters/{name}.json' for name in monsters},
+            'presets': {preset: f'presets/{preset}.json' for preset in presets}
+        }
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as file:
+            file.writestr(INDEX_NAME, json.dumps(index))
+
+            for name, data in monsters.items():
+                file.writestr(index['monsters'][name], json.dumps(data))
+
+            for preset, move_params in presets.items():
+                file.writestr(index['presets'][preset], json.dumps(move_params))
+
+def _canonical(data: dict[str, any]) -> str:
+    """Returns JSON that is the same for equal data.
+    """
+    return json.dumps(data, sort_keys = True, separators = (',', ':'))
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('usage: python -m fighter.content_pack PACK MONSTER_JSON...')
+        sys.exit(2)
+
+    ContentPack.build(sys.argv[1], sys.argv[2:])
+
+    with ContentPack(sys.argv[1]) as pack:
+        print(f'{len(pack.monsters)} monsters and {len(pack.preset_files)} presets written to {sys.argv[1]}')
@@ -22,7 +22,7 @@ class Effect:
     
     """
 
-    @dataclass(frozen = True)
+    @dataclass(frozen = True, slots = True)
     class EffectGroup:
         """EffectGroup represents a collection of 3 callbacks.
 
@@ -31,38 +31,43 @@ class Effect:
         pre-effect function(s) execute before the main effect. Then 
         the main effect will execute. Lastly, the post-effect 
         function(s) will execute. There can only be one function 
-        running per effect.
+        running per effect. Every callback receives the caster's 
+        cache, so an EffectGroup can be shared between fighters.
 
-        pre_effect (callable[None, None]): The effect(s) to run 
-        before the main effect.
-        main_effect (callable[dict[str, any], dict[str, any]]): The
+        pre_effect (callable[[dict[str, any]], None]): The effect(s) 
+        to run before the main effect.
+        main_effect (callable[[dict[str, any]], EffectNode]): The
         main effect.
-        post_effect (callable[None, None]): The effect(s) to run 
-        after the main effect.
+        post_effect (callable[[dict[str, any]], None]): The effect(s)
+        to run after the main effect.
 
         """
         
-        pre_effect: callable[None, None]
-        main_effect: type[effect_node.EffectNode]
-        post_effect: callable[None, None]
+        pre_effect: callable[[dict[str, any]], None]
+        main_effect: callable[[dict[str, any]], effect_node.EffectNode]
+        post_effect: callable[[dict[str, any]], None]
 
-        def __call__(self, target: dict[str]) -> None:
+        def __call__(self, caster: dict[str, any], target: dict[str, any]) -> None:
             """Triggers this EffectGroup.
 
             Args:
-                target (dict[str]): The target to apply effect group 
-                on.
+                caster (dict[str, any]): The cache of the fighter 
+                casting this effect group.
+                target (dict[str, any]): The target to apply effect 
+                group on.
             """
-            self.pre_effect()
-            self.main_effect()(target)
-            self.post_effect()
+            self.pre_effect(caster)
+            self.main_effect(caster)(target)
+            self.post_effect(caster)
     
+    __slots__ = ('effects',)
+
     def __init__(self, *effects: Effect.EffectGroup):
         """Initializes an Effect from a collection of 3 callbacks.
         """
         self.effects: tuple[Effect.EffectGroup] = effects
 
-    def __call__(self, target: dict[str, any]) -> None:
+    def __call__(self, caster: dict[str, any], target: dict[str, any]) -> None:
         """Triggers the pre-effects, main effects, and post-effects.
 
         Triggers the pre-effects, main effects, and post-effects in
@@ -70,13 +75,15 @@ class Effect:
         know who the target is.
 
         Args:
+            caster (dict[str, any]): The cache of the fighter casting
+            this effect.
             target (dict[str, any]): The target to cast an effect on.
         """
         for effect in self.effects:
-            effect(target)
+            effect(caster, target)
     
     @staticmethod
-    def generate(caster: dict[str, any], effects_list: list[dict[str, any]]) -> Effect:
+    def generate(effects_list: list[dict[str, any]]) -> Effect:
         """Generates an effect based on the JSON template.
 
         Generates an effect based on the JSON template. For reference,
@@ -84,7 +91,6 @@ class Effect:
         expected format.
 
         Args:
-            caster (dict[str, any]): The fighter casting this effect.
             effects_list (list[dict[str, any]]): The functions to
             execute for this effect.
 
@@ -94,13 +100,10 @@ class Effect:
         generated_effects = []
         
         for effect in effects_list:
-            name = effect.pop('effect')
-
-            pre_effect = function_chain.FunctionChain.generate(effect.pop('pre effect'), caster)
-            post_effect = function_chain.FunctionChain.generate(effect.pop('post effect'), caster)
+            pre_effect = function_chain.FunctionChain.generate(effect['pre effect'])
+            post_effect = function_chain.FunctionChain.generate(effect['post effect'])
             generated_effect = conditional_function.ConditionalFunction.generate(
-                effects.EFFECTS[name], 
-                caster, 
+                effects.EFFECTS[effect['effect']], 
                 effect['inferred parameters'], 
                 effect['literal parameters'], 
                 effect['requirements']
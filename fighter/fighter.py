@@ -1,7 +1,18 @@
 from __future__ import annotations
-import json
-import functions.function_chain as function_chain
+import random
+from array import array
 import fighter.move as move
+import fighter.fighter_template as fighter_template
+
+# Cache values that can be compared to tell if a requirement reading
+# them may evaluate differently. Other values (such as lists) can be
+# changed in place, so requirements reading them are always evaluated.
+MASKABLE_TYPES = (int, float, bool, str, type(None))
+
+# The result of a command that Fighter.apply_moves skipped because its
+# attacker was not in a challenge (the smallest value of an array('q'),
+# which no hp change can reach).
+SKIPPED = -2 ** 63
 
 class Fighter:
     """Fighter represents an active participant in the game.
@@ -22,16 +33,23 @@ class Fighter:
         use the targets attribute instead.
         last hit (int): The index of the target who is being
         targetted. This value is -1 if no target is selected.
+        rng (random.Random): The random generator used by the
+        effects of this Fighter. Fighters in the same battle should
+        share one generator so that a battle can be replayed from
+        its seed without touching the global random state.
     
     Attributes:
         cache (dict[str, any]): The "JSON" that this class manages.
         moves (list[Move]): The list of moves this Fighter can
-        use.
+        use. Fighters spawned from the same FighterTemplate share
+        the same moves.
         targets (list[Fighter]): All other Fighter(s) this class can
         target.
     
     """
-    def __init__(self, name: str, max_hp: int, cache: dict[str, any] = None, moves: list[move.Move] = None):
+    __slots__ = ('cache', 'moves', 'targets', '__mask', '__mask_keys', '__mask_values')
+
+    def __init__(self, name: str, max_hp: int, cache: dict[str, any] = None, moves: list[move.Move] = None, rng: random.Random = None):
         """Initializes a Fighter with basic information.
 
         Args:
@@ -41,6 +59,9 @@ class Fighter:
             class manages.
             moves (list[move.Move], optional): The list of moves 
             this Fighter can use.
+            rng (random.Random, optional): The random generator used
+            by the effects of this Fighter. Defaults to a new
+            generator.
         """
         self.cache: dict[str, any] = cache or {}
         self.moves: list[move.Move] = moves or []
@@ -52,6 +73,11 @@ class Fighter:
         self.__reserve_cache('moves', self.moves)
         self.__reserve_cache('targets', self.targets)
         self.__reserve_cache('last hit', -1)
+        self.__reserve_cache('rng', rng or random.Random())
+
+        self.__mask: int = 0
+        self.__mask_keys: tuple[str] | None = None
+        self.__mask_values: tuple | None = None
 
     @staticmethod
     def load_json(path: str) -> Fighter:
@@ -59,7 +85,9 @@ class Fighter:
 
         Loads a Fighter from a given JSON file. See
         assets/templates/monster_template.json for reference on how
-        a Fighter JSON should look like.
+        a Fighter JSON should look like. To spawn many Fighters from
+        the same JSON, load a FighterTemplate once and use
+        FighterTemplate.spawn instead.
 
         Args:
             path (str): The relative or absolute path to the JSON.
@@ -67,24 +95,7 @@ class Fighter:
         Returns:
             The generated Fighter object.
         """
-        with open(path, 'r') as file:
-            data = json.load(file)
-
-        fighter = Fighter(data['name'], data['max health'], data['cache'])
-
-        for move_params in data['moves']:
-            fighter.moves.append(
-                move.Move.generate(
-                    fighter.cache, 
-                    move_params['name'],
-                    move_params['effects'],
-                    move_params['requirements']
-                )
-            )
-
-        function_chain.FunctionChain.generate(data['post init'], fighter.cache)()
-
-        return fighter
+        return fighter_template.FighterTemplate.load_json(path).spawn()
 
     def __bool__(self) -> bool:
         """Returns a bool regarding whether this Fighter is alive.
@@ -145,20 +156,220 @@ class Fighter:
             target_index (int): The index of the target to attack.
         """
         self.cache['last hit'] = target_index
-        self.moves[move_index](self.targets[target_index].cache)
+        self.moves[move_index](self.cache, self.targets[target_index].cache)
+
+        if not (self and any(self.targets)):
+            self.on_challenge_end()
+
+    @staticmethod
+    def apply_moves(fighters: list[Fighter], commands: list[tuple[int, int, int]], results: array = None) -> array:
+        """Uses a sequence of Moves in one call.
+
+        Applies every (attacker, move, target) command in order, where
+        attacker is an index into fighters and move and target are
+        the indices passed to Fighter.attack. This behaves like
+        calling attack for every command, but runs in one loop and
+        only does the end-of-challenge check after a command leaves
+        the attacker or the target with no hp (only their hp can
+        change). A command whose attacker is not in a challenge (such
+        as one whose battle ended earlier in the same call) is skipped,
+        and the commands after it are still applied.
+
+        Args:
+            fighters (list[Fighter]): The fighters the attacker indices
+            refer to.
+            commands (list[tuple[int, int, int]]): The (attacker, move,
+            target) commands. Anything with a tolist method (such as a
+            NumPy array of shape (n, 3)) is converted with it first.
+            results (array, optional): The array to write the results
+            to (it needs at least one item per command). Defaults to a
+            new array('q') with one item per command.
+
+        Raises:
+            PermissionError: The requirements for the Move of a
+            command are not satisfied.
+
+        Returns:
+            The hp lost by the target of every command, in the order
+            of commands, or SKIPPED for every skipped command.
+        """
+        if hasattr(commands, 'tolist'):
+            commands = commands.tolist()
+
+        if results is None:
+            results = array('q', bytes(8 * len(commands)))
+
+        for index, (attacker_index, move_index, target_index) in enumerate(commands):
+            attacker = fighters[attacker_index]
+            if not attacker.targets:
+                results[index] = SKIPPED
+                continue
+
+            caster = attacker.cache
+            target = attacker.targets[target_index].cache
+            target_hp = target['hp']
+
+            caster['last hit'] = target_index
+            attacker.moves[move_index](caster, target)
+
+            results[index] = target_hp - target['hp']
+
+            if (caster['hp'] <= 0 or target['hp'] <= 0) and not (attacker and any(attacker.targets)):
+                attacker.on_challenge_end()
+
+        return results
+
+    def attack_available(self, available_index: int, target_index: int, mask: int = None) -> None:
+        """Uses the n-th available Move on a target Fighter.
+
+        Uses the Move at available_index in get_possible_moves on a
+        target Fighter. If the requirements of the moves do not write
+        to the cache and mask is the current cached mask (see
+        get_available_moves_mask), the requirements of the Move are
+        known to be satisfied, so they are not evaluated again.
+        Otherwise this behaves like attack, so a stale mask can never
+        use a Move whose requirements are not satisfied.
+
+        Args:
+            available_index (int): The index of the move among the
+            available moves.
+            target_index (int): The index of the target to attack.
+            mask (int, optional): The available moves mask the index
+            refers to. Defaults to get_available_moves_mask(). Pass
+            the mask that was used to pick the move so requirements
+            that write to the cache are not evaluated an extra time.
+
+        Raises:
+            ValueError: There are not more than available_index
+            available moves.
+            PermissionError: The requirements for the Move are no
+            longer satisfied.
+        """
+        if mask is None:
+            mask = self.get_available_moves_mask()
+            checked = self.__mask_keys is not None
+        else:
+            checked = self.__is_current(mask)
+
+        selected_move = self.moves[self.get_available_move_index(available_index, mask)]
+
+        self.cache['last hit'] = target_index
+        if checked:
+            selected_move.use(self.cache, self.targets[target_index].cache)
+        else:
+            selected_move(self.cache, self.targets[target_index].cache)
 
         if not (self and any(self.targets)):
             self.on_challenge_end()
 
+    def get_available_move_index(self, available_index: int, mask: int = None) -> int:
+        """Returns the index in moves of the n-th available Move.
+
+        Args:
+            available_index (int): The index of the move among the
+            available moves.
+            mask (int, optional): The available moves mask. Defaults
+            to get_available_moves_mask().
+
+        Raises:
+            ValueError: There are not more than available_index
+            available moves.
+
+        Returns:
+            The index of the Move in the moves attribute.
+        """
+        if mask is None:
+            mask = self.get_available_moves_mask()
+
+        for _ in range(available_index):
+            mask &= mask - 1
+
+        if not mask:
+            raise ValueError(f'There is no available move at index {available_index}')
+
+        return (mask & -mask).bit_length() - 1
+
+    def get_available_moves_mask(self) -> int:
+        """Returns a bitmask of the available moves.
+
+        Bit i of the mask is set if the requirements for the Move at
+        index i are satisfied. The mask is cached, and the
+        requirements are only evaluated again once the value of a
+        cache key read by any of them has changed. Requirements whose
+        keys cannot be known in advance or that write to the cache
+        (see Move.requirement_reads), or that read values which can
+        change in place, are evaluated on every call.
+
+        Note:
+            The mask is only cached if the requirements of every Move
+            are made of nothing but expressions without a key. No
+            registered function is pure (see functions.PURE_FUNCTIONS),
+            so a single requirement with a function in it (such as a
+            compare) makes every call evaluate every requirement,
+            exactly like calling Move.is_ready on every Move.
+
+        Returns:
+            The bitmask of the available moves.
+        """
+        cache = self.cache
+
+        if self.__mask_values is not None and self.__mask_values == tuple(map(cache.get, self.__mask_keys)):
+            return self.__mask
+
+        mask = 0
+        for index, available_move in enumerate(self.moves):
+            if available_move.is_ready(cache):
+                mask |= 1 << index
+
+        self.__mask = mask
+        self.__mask_keys = self.__requirement_keys()
+        self.__mask_values = None
+
+        if self.__mask_keys is not None:
+            values = tuple(map(cache.get, self.__mask_keys))
+            if all(type(value) in MASKABLE_TYPES for value in values):
+                self.__mask_values = values
+
+        return mask
+
+    def __is_current(self, mask: int) -> bool:
+        """Returns whether a mask is the cached mask and still valid.
+        """
+        return (
+            self.__mask_values is not None
+            and mask == self.__mask
+            and self.__mask_values == tuple(map(self.cache.get, self.__mask_keys))
+        )
+
+    def __requirement_keys(self) -> tuple[str] | None:
+        """Returns the cache keys read by the requirements of every Move.
+
+        Returns:
+            The cache keys, or None if any of them cannot be known in
+            advance.
+        """
+        keys = set()
+
+        for available_move in self.moves:
+            reads = available_move.requirement_reads()
+            if reads is None:
+                return None
+            keys |= reads
+
+        return tuple(keys)
+
     def get_possible_moves(self) -> tuple[move.Move]:
         """Returns a list of all available moves.
 
-        Returns a list of all available moves.
+        Returns a list of all available moves, in the order of the
+        moves attribute (see get_available_moves_mask).
 
         Returns:
             A list of all available moves.
         """
-        return (move for move in self.moves if move.requirement())
+        mask = self.get_available_moves_mask()
+
+        return tuple(available_move for index, available_move in enumerate(self.moves) if mask >> index & 1)
 
     def challenge_target(self, other: Fighter) -> None:
         """Adds each Fighter to the other's target list.
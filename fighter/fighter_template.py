@@ -0,0 +1,173 @@
+from __future__ import annotations
+import copy
+import json
+import random
+from types import MappingProxyType
+import functions.function_chain as function_chain
+import functions.functions as functions
+import analysis.cost_model as cost_model
+import analysis.telemetry as telemetry
+import fighter.fighter as fighter
+import fighter.move as move
+
+class FighterTemplate:
+    """FighterTemplate represents the compiled JSON of a Fighter.
+
+    FighterTemplate holds everything about a Fighter that does not
+    change during a challenge: the moves (and the effects,
+    requirements and functions inside them) and the post init
+    functions. None of these hold on to a cache, so a single
+    FighterTemplate can spawn any number of Fighters that all share
+    the same move graph. The only per-Fighter state is the cache.
+    A FighterTemplate is not modified after it is generated, and
+    Fighters never receive its mutable values themselves: the cache
+    and the literal parameters of its functions are copied where they
+    could be changed in place (see spawn and FunctionNode). This is
+    what lets a template be shared between threads; telemetry
+    counters are the exception (see analysis.telemetry).
+
+    Attributes:
+        name (str): The name of the spawned Fighters.
+        max_hp (int): The upper hp limit of the spawned Fighters.
+        cache (MappingProxyType[str, any]): The initial cache of the
+        spawned Fighters (read-only). It is copied for every spawned
+        Fighter, and values that can be changed in place (such as
+        lists) are deep copied, so no two Fighters share them.
+        moves (tuple[Move]): The moves shared by the spawned
+        Fighters.
+        post_init (FunctionChain): The functions to run on the cache
+        of every spawned Fighter.
+    """
+    __slots__ = ('name', 'max_hp', 'cache', 'moves', 'post_init')
+
+    def __init__(self, name: str, max_hp: int, cache: dict[str, any], moves: tuple[move.Move], post_init: function_chain.FunctionChain):
+        """Initializes a FighterTemplate with compiled data.
+
+        Args:
+            name (str): The name of the spawned Fighters.
+            max_hp (int): The upper hp limit of the spawned Fighters.
+            cache (dict[str, any]): The initial cache of the spawned
+            Fighters.
+            moves (tuple[Move]): The moves shared by the spawned
+            Fighters.
+            post_init (FunctionChain): The functions to run on the
+            cache of every spawned Fighter.
+        """
+        self.name: str = name
+        self.max_hp: int = max_hp
+        self.cache: MappingProxyType[str, any] = MappingProxyType(copy.deepcopy(dict(cache)))
+        self.moves: tuple[move.Move] = moves
+        self.post_init: function_chain.FunctionChain = post_init
+
+    def spawn(self, rng: random.Random = None) -> fighter.Fighter:
+        """Creates a new Fighter from this FighterTemplate.
+
+        Args:
+            rng (random.Random, optional): The random generator of the
+            spawned Fighter. Defaults to a new generator.
+
+        Returns:
+            The spawned Fighter.
+        """
+        cache = {
+            key: value if type(value) in functions.IMMUTABLE_TYPES else copy.deepcopy(value)
+            for key, value in self.cache.items()
+        }
+
+        spawned = fighter.Fighter(self.name, self.max_hp, cache, self.moves, rng)
+        self.post_init(spawned.cache)
+
+        return spawned
+
+    @staticmethod
+    def generate(data: dict[str, any], budget: cost_model.CostBudget = None, counters: telemetry.Telemetry = None, presets: dict[str, move.Move] = None) -> FighterTemplate:
+        """Generates a FighterTemplate from the expected JSON data.
+
+        A move may be written as {"preset": name}, in which case the
+        compiled Move of that name in presets is used (and shared with
+        every other template using it). Such presets must also be
+        listed in the "presets" field of the fighter JSON.
+
+        Args:
+            data (dict[str, any]): The fighter JSON data. See
+            assets/templates/monster_template.json for reference.
+            budget (CostBudget, optional): The budget the worst-case
+            costs of the template must fit in (see
+            analysis.cost_model).
+            counters (Telemetry, optional): The telemetry to count the
+            moves and requirements of the template in.
+            presets (dict[str, Move], optional): The compiled presets
+            by name (see fighter.content_pack).
+
+        Raises:
+            ValueError: The template is nested deeper than
+            cost_model.MAX_NESTING, exceeds the budget, uses a preset
+            that is not listed or not in presets, or a template with
+            the same name was already instrumented in counters.
+
+        Returns:
+            The generated FighterTemplate.
+        """
+        cost_model.check_nesting(data, f'\'{data["name"]}\'')
+
+        moves = []
+
+        for move_params in data['moves']:
+            if 'preset' not in move_params:
+                moves.append(move.Move.generate(
+                    move_params['name'],
+                    move_params['effects'],
+                    move_params['requirements']
+                ))
+                continue
+
+            preset = move_params['preset']
+            if preset not in data.get('presets', ()):
+                raise ValueError(f'Preset \'{preset}\' is not listed in the presets of \'{data["name"]}\'')
+            if presets is None or preset not in presets:
+                raise ValueError(f'Unknown preset \'{preset}\'')
+
+            moves.append(presets[preset])
+
+        moves = tuple(moves)
+        post_init = function_chain.FunctionChain.generate(data['post init'])
+
+        template = FighterTemplate(data['name'], data['max health'], data['cache'], moves, post_init)
+
+        if budget is not None:
+            budget.enforce(template)
+
+        if counters is not None:
+            # Presets are shared with other templates, so the counters
+            # go on a copy of the move graph.
+            moves, post_init = counters.instrument(template.name, moves, post_init)
+            template = FighterTemplate(template.name, template.max_hp, template.cache, moves, post_init)
+
+        return template
+
+    @staticmethod
+    def load_json(path: str, budget: cost_model.CostBudget = None, counters: telemetry.Telemetry = None) -> FighterTemplate:
+        """Loads a FighterTemplate from a given JSON file.
+
+        Args:
+            path (str): The relative or absolute path to the JSON.
+            budget (CostBudget, optional): The budget the worst-case
+            costs of the template must fit in.
+            counters (Telemetry, optional): The telemetry to count the
+            moves and requirements of the template in.
+
+        Raises:
+            ValueError: The template is nested too deeply, exceeds the
+            budget, or a template with the same name was already
+            instrumented in counters.
+
+        Returns:
+            The generated FighterTemplate.
+        """
+        with open(path, 'r') as file:
+            try:
+                data = json.load(file)
+            except RecursionError:
+                raise ValueError(f'{path} is nested too deeply to parse') from None
+
+        return FighterTemplate.generate(data, budget, counters)
@@ -1,52 +1,92 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
 import functions.bool_evaluation_set as bool_evaluation_set
 import fighter.effect as effect
 
-@dataclass(frozen = True)
+@dataclass(frozen = True, slots = True)
 class Move:
     """Move is a wrapper for effects.
 
     Move is a wrapper for effects. It includes both a name and a
     requirement for said effects to trigger. Moves should be hidden
-    when their requirement(s) are not met.
+    when their requirement(s) are not met. A Move does not belong to
+    any particular fighter; the caster's cache is passed in whenever
+    the Move is checked or used.
 
     Attibutes:
         name (str): The name of this Move.
         effect (Effect): The effect to trigger when this move is used.
-        requirement (callable[None, bool]): The callback to tell 
-        whether conditions for this Move are satisfied.
+        requirement (callable[[dict[str, any]], bool]): The callback 
+        to tell whether conditions for this Move are satisfied.
+        counters (array | None): The telemetry counters this Move
+        counts its uses in (see analysis.telemetry), or None.
+        counter (int): The index of the uses counter in counters.
     """
     name: str
     effect: effect.Effect
-    requirement: callable[None, bool]
+    requirement: callable[[dict[str, any]], bool]
+    counters: array | None = field(default = None, compare = False, repr = False)
+    counter: int = field(default = 0, compare = False, repr = False)
 
-    def __bool__(self) -> bool:
+    def is_ready(self, caster: dict[str, any]) -> bool:
         """Returns whether or not this Move is ready.
 
+        Args:
+            caster (dict[str, any]): The cache of the fighter that 
+            would use this Move.
+
         Returns:
             bool: Whether or not this Move is ready.
         """
-        return self.requirement()
+        return self.requirement(caster)
+
+    def requirement_reads(self) -> frozenset[str] | None:
+        """Returns the cache keys the requirement of this Move reads.
+
+        Returns:
+            The cache keys, or None if they cannot be known in 
+            advance or the requirement writes to the cache.
+        """
+        if not hasattr(self.requirement, 'cache_reads'):
+            return None
+
+        return self.requirement.cache_reads()
 
-    def __call__(self, target: dict[str, any]) -> None:
+    def __call__(self, caster: dict[str, any], target: dict[str, any]) -> None:
         """Triggers the effect if this Move is ready.
 
         Args:
+            caster (dict[str, any]): The cache of the fighter using 
+            this Move.
             target (dict[str, any]): The target to apply the effect 
             on.
 
         Raises:
             PermissionError: The requirements for this Move are not 
-            satisfued (bool(Move) returns False).
+            satisfued (Move.is_ready returns False).
         """
-        if not bool(self):
+        if not self.is_ready(caster):
             raise PermissionError("The requirements for this Move are not satisfied.")
         
-        self.effect(target)
+        self.use(caster, target)
+
+    def use(self, caster: dict[str, any], target: dict[str, any]) -> None:
+        """Triggers the effect without checking the requirement.
+
+        Args:
+            caster (dict[str, any]): The cache of the fighter using 
+            this Move.
+            target (dict[str, any]): The target to apply the effect 
+            on.
+        """
+        if self.counters is not None:
+            self.counters[self.counter] += 1
+
+        self.effect(caster, target)
 
     @staticmethod
-    def generate(caster: dict[str, any], name: str, effects: list[dict[str, any]], requirements: list[list[dict[str, any]]]) -> Move:
+    def generate(name: str, effects: list[dict[str, any]], requirements: list[list[dict[str, any]]]) -> Move:
         """Generates a Move based on the JSON template.
 
         Generates a Move based on the JSON template. For reference,
@@ -54,7 +94,6 @@ class Move:
         expected format.
 
         Args:
-            caster (dict[str, any]): The fighter using this Move.
             name (str): The name of this Move.
             effects (list[dict[str, any]]): The functions to
             execute for this Move/Effect.
@@ -64,7 +103,7 @@ class Move:
         Returns:
             The generated Move.
         """
-        effect_callback = effect.Effect.generate(caster, effects)
-        requirement = bool_evaluation_set.BoolEvaluationSet.generate(caster, requirements)
+        effect_callback = effect.Effect.generate(effects)
+        requirement = bool_evaluation_set.BoolEvaluationSet.generate(requirements)
 
-        return Move(name, effect_callback, requirement)
\ No newline at end of file
+        return Move(name, effect_callback, requirement)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+import os
+import threading
+import fighter.fighter as fighter
+import fighter.fighter_template as fighter_template
+import analysis.cost_model as cost_model
+
+class TemplateRegistry:
+    """TemplateRegistry keeps the compiled FighterTemplates of a directory.
+
+    TemplateRegistry compiles every fighter JSON in a directory
+    (such as assets/data/monsters/) and can refresh itself, in which
+    case only the files that were added or changed since the last
+    refresh are recompiled. The templates are swapped in all at once
+    by replacing the whole mapping, so a reader always sees either
+    the old or the new set. Fighters that were already spawned keep
+    using the template (and moves) they were spawned from, so battles
+    in progress are not affected by a refresh.
+
+    Attributes:
+        directory (str): The directory the fighter JSON files are in.
+        templates (dict[str, FighterTemplate]): The templates by name
+        (the file name without the .json extension).
+        versions (dict[str, tuple[int, int]]): The modification time
+        and size of every compiled file, by name.
+        errors (dict[str, Exception]): The error raised by every file
+        that failed to compile (including files nested too deeply to
+        compile), by name. The previous template (if
+        any) is kept for these files until they are fixed.
+        budget (CostBudget | None): The budget every template must fit
+        in. Templates that exceed it fail to compile.
+    """
+    def __init__(self, directory: str, budget: cost_model.CostBudget = None):
+        """Initializes a TemplateRegistry and compiles every template.
+
+        Args:
+            directory (str): The directory the fighter JSON files are
+            in.
+            budget (CostBudget, optional): The budget every template
+            must fit in.
+        """
+        self.directory: str = directory
+        self.budget: cost_model.CostBudget | None = budget
+        self.templates: dict[str, fighter_template.FighterTemplate] = {}
+        self.versions: dict[str, tuple[int, int]] = {}
+        self.errors: dict[str, Exception] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+        self.refresh()
+
+    def __getitem__(self, name: str) -> fighter_template.FighterTemplate:
+        """Returns the current template with the given name.
+
+        Args:
+            name (str): The name of the template.
+
+        Returns:
+            The current template.
+        """
+        return self.templates[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+
+    def spawn(self, name: str) -> fighter.Fighter:
+        """Spawns a Fighter from the current template with the given name.
+
+        Args:
+            name (str): The name of the template.
+
+        Returns:
+            The spawned Fighter.
+        """
+        return self.templates[name].spawn()
+
+    def refresh(self) -> list[str]:
+        """Recompiles the templates whose files changed.
+
+        Files that were added or whose modification time or size
+        changed are recompiled, and templates whose files were
+        removed are dropped. The new set of templates replaces the
+        old one in a single assignment.
+
+        Returns:
+            The names of the templates that were added, recompiled or
+            removed.
+        """
+        with self.__lock:
+            versions = {}
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    versions[entry.name[:-len('.json')]] = (stat.st_mtime_ns, stat.st_size)
+
+            templates = {name: template for name, template in self.templates.items() if name in versions}
+            changed = [name for name in self.templates if name not in versions]
+            errors = {}
+
+            for name, version in versions.items():
+                if self.versions.get(name) == version:
+                    if name in self.errors:
+                        errors[name] = self.errors[name]
+                    continue
+
+                try:
+                    templates[name] = fighter_template.FighterTemplate.load_json(os.path.join(self.directory, f'{name}.json'), self.budget)
+                except (OSError, ValueError, KeyError, TypeError, RecursionError) as error:
+                    # Deep JSON is rejected with a ValueError (see
+                    # cost_model.check_nesting), but one bad file must
+                    # never stop the refresh (or the watcher thread).
+                    errors[name] = error
+                    continue
+
+                changed.append(name)
+
+            self.templates = templates
+            self.versions = versions
+            self.errors = errors
+
+            return changed
+
+class TemplateWatcher(threading.Thread):
+    """TemplateWatcher refreshes a TemplateRegistry in the background.
+
+    TemplateWatcher polls the directory of a TemplateRegistry at a
+    fixed interval and refreshes the registry. Polling is used
+    because it works on every platform without extra dependencies,
+    and a refresh only stats the files unless one of them changed.
+
+    Attributes:
+        registry (TemplateRegistry): The registry to refresh.
+        interval (float): The number of seconds between refreshes.
+        on_refresh (callable[[list[str]], None] | None): Called with
+        the changed template names after every refresh that changed
+        something.
+    """
+    def __init__(self, registry: TemplateRegistry, interval: float = 1.0, on_refresh: callable[[list[str]], None] = None):
+        """Initializes a TemplateWatcher (call start to start polling).
+
+        Args:
+            registry (TemplateRegistry): The registry to refresh.
+            interval (float, optional): The number of seconds between
+            refreshes. Defaults to 1.0.
+            on_refresh (callable[[list[str]], None], optional): Called
+            with the changed template names after every refresh that
+            changed something.
+        """
+        super(TemplateWatcher, self).__init__(daemon = True)
+        self.registry: TemplateRegistry = registry
+        self.interval: float = interval
+        self.on_refresh: callable[[list[str]], None] | None = on_refresh
+        self.__stopped: threading.Event = threading.Event()
+
+    def run(self) -> None:
+        """Refreshes the registry until stop is called.
+        """
+        while not self.__stopped.wait(self.interval):
+            changed = self.registry.refresh()
+
+            if changed and self.on_refresh is not None:
+                self.on_refresh(changed)
+
+    def stop(self) -> None:
+        """Stops polling and waits for the thread to finish.
+        """
+        self.__stopped.set()
+        self.join()
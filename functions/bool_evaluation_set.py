@@ -1,6 +1,8 @@
 from __future__ import annotations
+from array import array
 import functions.conditional_function as conditional_function
 import functions.functions as functions
+import functions.expression as expression
 from enum import Enum, unique, auto
 
 @unique
@@ -17,95 +19,121 @@ class BoolEvalType(Enum):
 class BoolEvaluationSet:
     """BoolEvaluationSet represents a collection of propositional callbacks.
 
-    BoolEvaluationSet represents a collection of callbacks that 
-    return either True or False. The purpose of this class is to 
-    combine the propositions of those callbacks.
+    BoolEvaluationSet represents a collection of callbacks that
+    return either True or False. The purpose of this class is to
+    combine the propositions of those callbacks. Every callback
+    receives the cache that the BoolEvaluationSet is called with.
 
     Attributes:
-        evaluations (list[callable[None, bool]]): The callbacks to
-        obtain propositions from
+        evaluations (tuple[callable[[dict[str, any]], bool]]): The
+        callbacks to obtain propositions from
         eval_type (BoolEvalType): The method to combine propositions
-        (or propositional connective). 
+        (or propositional connective).
+        counters (array | None): The telemetry counters this
+        BoolEvaluationSet counts its evaluations (at counter) and the
+        times it was satisfied (at counter + 1) in, or None (see
+        analysis.telemetry).
+        counter (int): The index of the evaluations counter in
+        counters.
     """
-    def __init__(self, eval_type: BoolEvalType = BoolEvalType.AND, *evaluations: callable[None, bool]):
+    __slots__ = ('evaluations', 'eval_type', 'counters', 'counter')
+
+    def __init__(self, eval_type: BoolEvalType = BoolEvalType.AND, *evaluations: callable[[dict[str, any]], bool]):
         """Initializes a BoolEvaluation set from the connective and callbacks.
 
         Args:
-            eval_type (BoolEvalType, optional): The method to combine 
+            eval_type (BoolEvalType, optional): The method to combine
             propositions. Defaults to BoolEvalType.AND.
-            evaluations (tuple[callable[None, bool]]): The callbacks to
-            obtain propositions from
+            evaluations (tuple[callable[[dict[str, any]], bool]]): The
+            callbacks to obtain propositions from
         """
-        self.evaluations: list[callable[None, bool]] = list(evaluations)
+        self.evaluations: tuple[callable[[dict[str, any]], bool]] = evaluations
         self.eval_type: BoolEvalType = eval_type
+        self.counters: array | None = None
+        self.counter: int = 0
 
-    def __bool__(self) -> bool:
+    def __call__(self, cache: dict[str, any]) -> bool:
         """Returns the combined value of the callback propositions.
 
+        Args:
+            cache (dict[str, any]): The cache of the fighter the
+            propositions are evaluated for.
+
         Returns:
             The combined value of the callback propositions.
         """
         if not self.evaluations:
-            return True
-        
-        if self.eval_type == BoolEvalType.AND:
+            satisfied = True
+        elif self.eval_type == BoolEvalType.AND:
+            satisfied = True
             for evaluation in self.evaluations:
-                if evaluation() is False: return False
-            return True
+                if evaluation(cache) is False:
+                    satisfied = False
+                    break
         else:
+            satisfied = False
             for evaluation in self.evaluations:
-                if evaluation() is True: return True
-            return False
-        
-    def __call__(self):
-        """Returns the combined value of the callback propositions.
+                if evaluation(cache) is True:
+                    satisfied = True
+                    break
+
+        if self.counters is not None:
+            self.counters[self.counter] += 1
+            if satisfied:
+                self.counters[self.counter + 1] += 1
 
-        This function is interchangeable with using 
-        bool(BoolEvaluationSet).
+        return satisfied
+
+    def cache_reads(self) -> frozenset[str] | None:
+        """Returns the cache keys this BoolEvaluationSet reads.
 
         Returns:
-            The combined value of the callback propositions.
+            The cache keys read by the evaluations, or None if they
+            cannot be known in advance or any of them writes to the
+            cache.
         """
-        return bool(self)
-        
+        return conditional_function._union(*self.evaluations)
+
     @staticmethod
-    def generate(data: dict[str, any], requirements: list[list[dict[str, any]]]) -> BoolEvaluationSet:
+    def generate(requirements: list[list[dict[str, any]]]) -> BoolEvaluationSet:
         """Creates a BoolEvaluationSet from the expected JSON data.
 
         Creates a BoolEvaluationSet from the expected JSON data.
         All statements within the nested list use the AND connective
-        while the OR connective is used with said nested list. So if 
+        while the OR connective is used with said nested list. So if
         you want to use the OR connective, put only 1 statement in
-        each nested list.
+        each nested list. A requirement may also be written as an
+        inline expression (see Expression).
 
         Note:
-            A literal parameter of key/name 'cache' is automatically
-            inserted and it stores the data passed into this generate
-            function.
+            A parameter of key/name 'cache' is automatically passed
+            to every requirement function and it stores the cache
+            that the BoolEvaluationSet is called with.
 
         Args:
-            data (dict[str, any]): The dictionary that parameters are 
-            sourced from.
-            requirements (list[list[dict[str, any]]]): The 
+            requirements (list[list[dict[str, any]]]): The
             requirement function(s) JSON data to execute.
 
         Returns:
-            BoolEvaluationSet: _description_
+            BoolEvaluationSet: The generated BoolEvaluationSet.
         """
         generated_requirements = []
 
         for requirement_set in requirements:
-            generated_requirements.append(BoolEvaluationSet(BoolEvalType.AND))
+            evaluations = []
             for requirement in requirement_set:
-                requirement['literal parameters']['cache'] = data
-                generated_requirements[-1].evaluations.append(
+                if 'expr' in requirement:
+                    evaluations.append(expression.Expression.generate(requirement))
+                    continue
+
+                evaluations.append(
                     conditional_function.ConditionalFunction.generate(
-                        functions.FUNCTIONS[requirement.pop('function')], 
-                        data, 
-                        requirement['inferred parameters'], 
+                        functions.FUNCTIONS[requirement['function']],
+                        requirement['inferred parameters'],
                         requirement['literal parameters'],
                         requirement['requirements']
                     )
                 )
+            generated_requirements.append(BoolEvaluationSet(BoolEvalType.AND, *evaluations))
 
-        return BoolEvaluationSet(BoolEvalType.OR, *generated_requirements)
\ No newline at end of file
+        return BoolEvaluationSet(BoolEvalType.OR, *generated_requirements)
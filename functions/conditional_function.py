@@ -1,4 +1,5 @@
 from __future__ import annotations
+from array import array
 import functions.function_node as function_node
 import functions.bool_evaluation_set as bool_evaluation_set
 from typing import TypeVar
@@ -8,80 +9,122 @@ T = TypeVar('T')
 class ConditionalFunction:
     """ConditionalFunction represents a callable that has a conditional.
 
-    ConditionalFunction represents a callable (callback) that has a 
+    ConditionalFunction represents a callable (callback) that has a
     conditional. The callback will not execute if the requirement
     callback returns False. No error is thrown if False is returned
-    by the requirement function.
+    by the requirement function. Both callbacks receive the cache
+    that the ConditionalFunction is called with.
 
 
     Attributes:
-        function (callable[..., T]): The primary function.
-        requirement (callable[None, bool]): The requirement function
-        that returns True if the primary function can run and False
-        otherwise.
+        function (callable[[dict[str, any]], T]): The primary function.
+        requirement (callable[[dict[str, any]], bool]): The
+        requirement function that returns True if the primary
+        function can run and False otherwise.
+        counters (array | None): The telemetry counters this
+        ConditionalFunction counts its calls (at counter) and the
+        times the primary function ran (at counter + 1) in, or None
+        (see analysis.telemetry).
+        counter (int): The index of the calls counter in counters.
     """
-    def __init__(self, function: callable[..., T], requirement: callable[None, bool]):
+    __slots__ = ('function', 'requirement', 'counters', 'counter')
+
+    def __init__(self, function: callable[[dict[str, any]], T], requirement: callable[[dict[str, any]], bool]):
         """Initializes a ConditonalFunction with the given functions.
 
         Args:
-        function (callable[..., T]): The primary function.
-        requirement (callable[None, bool]): The requirement function
-        that returns True if the primary function can run and False
-        otherwise.
+        function (callable[[dict[str, any]], T]): The primary function.
+        requirement (callable[[dict[str, any]], bool]): The
+        requirement function that returns True if the primary
+        function can run and False otherwise.
         """
-        self.function: callable[..., T] = function
-        self.requirement: callable[None, bool] = requirement
+        self.function: callable[[dict[str, any]], T] = function
+        self.requirement: callable[[dict[str, any]], bool] = requirement
+        self.counters: array | None = None
+        self.counter: int = 0
 
-    def __call__(self) -> T:
+    def __call__(self, cache: dict[str, any]) -> T:
         """Runs the primary function if the requirement is satisfied.
 
         Runs the primary function if the requirement is satisfied. if
         the requirement is not satisfied, the return value is None.
         This function does not discern the source of the None.
 
+        Args:
+            cache (dict[str, any]): The cache of the fighter
+            triggering this function.
+
         Returns:
             The return value of the primary function.
         """
-        if self.requirement():
-            return self.function()
+        if self.counters is not None:
+            self.counters[self.counter] += 1
+
+        if self.requirement(cache):
+            if self.counters is not None:
+                self.counters[self.counter + 1] += 1
+
+            return self.function(cache)
+
+    def cache_reads(self) -> frozenset[str] | None:
+        """Returns the cache keys this ConditionalFunction reads.
+
+        Returns:
+            The cache keys read by the function and the requirement,
+            or None if they cannot be known in advance or anything
+            writes to the cache.
+        """
+        return _union(self.function, self.requirement)
 
     @staticmethod
-    def generate(function: callable[..., T], data: dict[str, any], inferred: dict[str, str], literal: dict[str, any], requirements: list[list[dict[str, any]]]) -> ConditionalFunction:
+    def generate(function: callable[..., T], inferred: dict[str, str], literal: dict[str, any], requirements: list[list[dict[str, any]]]) -> ConditionalFunction:
         """Creates a ConditionalFunction from the expected JSON data.
 
         Creates a ConditionaFunction from the expected JSON data. See
         assets/templates/move_template.json for details on what the
-        expected JSON data is. 
+        expected JSON data is.
 
         Note:
-            A literal parameter of key/name 'cache' is automatically
-            inserted and it stores the data passed into this generate
-            function.
-        
+            A parameter of key/name 'cache' is automatically passed
+            to the function and it stores the cache that the
+            ConditionalFunction is called with.
+
         Args:
             function (callable[..., T]): The primary function.
-            data (dict[str, any]): The dictionary that inferred 
-            parameters are sourced from.
             inferred (dict[str, str]): The inferred parameters
             (inferred's dict values will be used as keys to obtain
-            their new value from data and inferred's dict keys will
-            remain the same) that are passed into the function.
-            literal (dict[str, any]): literal parameters (those that 
-            do not come from data) to pass into the function.
-            requirements (list[list[dict[str, any]]]): The 
+            their new value from the cache and inferred's dict keys
+            will remain the same) that are passed into the function.
+            literal (dict[str, any]): literal parameters (those that
+            do not come from the cache) to pass into the function.
+            requirements (list[list[dict[str, any]]]): The
             requirements for the primary function to be executed.
 
         Returns:
             The generated ConditionalFunction.
         """
-        literal['cache'] = data
-        
         return ConditionalFunction(
-            function_node.FunctionNode(
-                function, 
-                lambda : {key: data[value] for key, value in inferred.items()} | literal
-            ), bool_evaluation_set.BoolEvaluationSet.generate(
-                data,
-                requirements
-            )
-        )
\ No newline at end of file
+            function_node.FunctionNode.generate(function, inferred, literal),
+            bool_evaluation_set.BoolEvaluationSet.generate(requirements)
+        )
+
+def _union(*callbacks: callable) -> frozenset[str] | None:
+    """Returns the union of the cache keys read by some callbacks.
+
+    Args:
+        callbacks (tuple[callable]): The callbacks. Callbacks without
+        a cache_reads method are treated as reading anything.
+
+    Returns:
+        The union of the cache keys, or None if any of the callbacks
+        cannot tell which keys it reads or writes to the cache.
+    """
+    reads = frozenset()
+
+    for callback in callbacks:
+        callback_reads = callback.cache_reads() if hasattr(callback, 'cache_reads') else None
+        if callback_reads is None:
+            return None
+        reads |= callback_reads
+
+    return reads
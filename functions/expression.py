@@ -0,0 +1,236 @@
+from __future__ import annotations
+import ast
+import functions.conditional_function as conditional_function
+import functions.bool_evaluation_set as bool_evaluation_set
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod)
+UNARY_OPERATORS = (ast.UAdd, ast.USub, ast.Not)
+COMPARE_OPERATORS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+BOOL_OPERATORS = (ast.And, ast.Or)
+
+# Operators that can build a str far larger than the expression itself
+# ('a' * 999999999, '%999999999d' % 1). They are never constant-folded
+# with a str operand, so loading content cannot allocate that much.
+GROWING_OPERATORS = (ast.Mult, ast.Mod)
+
+BUILTINS = {
+    'min': min,
+    'max': max,
+    'abs': abs
+}
+
+CONSTANTS = {
+    'true': True,
+    'false': False,
+    'none': None
+}
+
+class Expression:
+    """Expression represents an inline expression compiled to one callable.
+
+    Expression represents an inline expression (the "expr" form in the
+    JSON) such as "hp <= max_hp - 100". Names refer to cache keys,
+    with underscores standing in for spaces ("max_hp" reads the
+    "max hp" key). The expression is parsed once, constant-folded and
+    compiled to a single Python function that reads the cache
+    directly, so it costs one call instead of a chain of
+    ConditionalFunction, BoolEvaluationSet and FunctionNode objects.
+
+    Supported syntax: int, float, str and bool literals (true/false
+    may be lower case), + - * / // %, unary - + and not, comparisons
+    (chains included), and/or, "a if condition else b" and calls to
+    min, max and abs.
+
+    Attributes:
+        source (str): The expression as written in the JSON.
+        key (str | None): The cache key the result is stored to, if
+        any.
+        reads (frozenset[str]): The cache keys the expression reads.
+        function (callable[[dict[str, any]], any]): The compiled
+        expression.
+    """
+    __slots__ = ('source', 'key', 'reads', 'function')
+
+    def __init__(self, source: str, key: str = None):
+        """Parses and compiles an expression.
+
+        Args:
+            source (str): The expression to compile.
+            key (str, optional): The cache key to store the result
+            to. The result is not stored if no key is given.
+
+        Raises:
+            ValueError: The expression is not valid or uses
+            unsupported syntax.
+        """
+        try:
+            tree = ast.parse(source.strip(), mode = 'eval')
+        except SyntaxError as error:
+            raise ValueError(f'Invalid expression \'{source}\': {error.msg}') from None
+
+        reads = set()
+        body = _fold(_validate(tree.body, source))
+        body = _CacheAccess(reads).visit(body)
+
+        function = ast.parse('def expression(cache):\n    pass').body[0]
+
+        if key is None:
+            function.body = [ast.Return(body)]
+        else:
+            target = ast.Subscript(ast.Name('cache', ast.Load()), ast.Constant(key), ast.Store())
+            function.body = [
+                ast.Assign([ast.Name('value', ast.Store()), target], body),
+                ast.Return(ast.Name('value', ast.Load()))
+            ]
+
+        module = ast.fix_missing_locations(ast.Module([function], []))
+        namespace = {'__builtins__': {}} | BUILTINS
+        exec(compile(module, f'<expression {source!r}>', 'exec'), namespace)
+
+        self.source: str = source
+        self.key: str | None = key
+        self.reads: frozenset[str] = frozenset(reads)
+        self.function: callable[[dict[str, any]], any] = namespace['expression']
+
+    def __call__(self, cache: dict[str, any]) -> any:
+        """Evaluates the expression against a cache.
+
+        Args:
+            cache (dict[str, any]): The cache to read (and store the
+            result to, if a key was given).
+
+        Returns:
+            The value of the expression.
+        """
+        return self.function(cache)
+
+    def cache_reads(self) -> frozenset[str] | None:
+        """Returns the cache keys this Expression reads.
+
+        Returns:
+            The cache keys read by the expression, or None if it
+            writes its result to the cache.
+        """
+        if self.key is not None:
+            return None
+
+        return self.reads
+
+    @staticmethod
+    def generate(data: dict[str, any]) -> Expression | conditional_function.ConditionalFunction:
+        """Creates an Expression from the expected JSON data.
+
+        Creates an Expression from the expected JSON data. The data
+        must have an "expr" entry and may have a "key" entry (where
+        the result is stored) and a "requirements" entry. If there
+        are requirements, the Expression is wrapped in a
+        ConditionalFunction.
+
+        Args:
+            data (dict[str, any]): The expression JSON data.
+
+        Returns:
+            The generated Expression, or a ConditionalFunction
+            wrapping it.
+        """
+        expression = Expression(data['expr'], data.get('key'))
+        requirements = data.get('requirements', [])
+
+        if not requirements:
+            return expression
+
+        return conditional_function.ConditionalFunction(
+            expression,
+            bool_evaluation_set.BoolEvaluationSet.generate(requirements)
+        )
+
+def _validate(node: ast.AST, source: str) -> ast.AST:
+    """Checks that an expression only uses the supported syntax.
+
+    Args:
+        node (ast.AST): The root of the expression.
+        source (str): The expression (for error messages).
+
+    Raises:
+        ValueError: The expression uses unsupported syntax.
+
+    Returns:
+        The same node.
+    """
+    for child in ast.walk(node):
+        match child:
+            case ast.BinOp(op = op) if isinstance(op, BINARY_OPERATORS):
+                pass
+            case ast.UnaryOp(op = op) if isinstance(op, UNARY_OPERATORS):
+                pass
+            case ast.Compare(ops = ops) if all(isinstance(op, COMPARE_OPERATORS) for op in ops):
+                pass
+            case ast.BoolOp(op = op) if isinstance(op, BOOL_OPERATORS):
+                pass
+            case ast.Call(func = ast.Name(id = name), keywords = []) if name in BUILTINS:
+                pass
+            case ast.Constant(value = value) if isinstance(value, (int, float, str, bool)) or value is None:
+                pass
+            case ast.IfExp() | ast.Name() | ast.Load() | ast.operator() | ast.unaryop() | ast.cmpop() | ast.boolop():
+                pass
+            case _:
+                raise ValueError(f'Unsupported syntax \'{type(child).__name__}\' in expression \'{source}\'')
+
+    return node
+
+def _fold(node: ast.AST) -> ast.AST:
+    """Replaces every constant subexpression with its value.
+
+    Multiplying or formatting a str (see GROWING_OPERATORS) is left to
+    run time.
+
+    Args:
+        node (ast.AST): The root of the (validated) expression.
+
+    Returns:
+        The folded expression.
+    """
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return ast.Constant(CONSTANTS[node.id])
+
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, list):
+            setattr(node, field, [_fold(item) if isinstance(item, ast.expr) else item for item in value])
+        elif isinstance(value, ast.expr) and not (isinstance(node, ast.Call) and field == 'func'):
+            setattr(node, field, _fold(value))
+
+    if isinstance(node, (ast.Constant, ast.Name)):
+        return node
+
+    function = node.func if isinstance(node, ast.Call) else None
+    children = [child for child in ast.iter_child_nodes(node) if isinstance(child, ast.expr) and child is not function]
+
+    if not all(isinstance(child, ast.Constant) for child in children):
+        return node
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, GROWING_OPERATORS) and any(isinstance(child.value, str) for child in children):
+        return node
+
+    try:
+        expression = ast.fix_missing_locations(ast.Expression(node))
+        value = eval(compile(expression, '<fold>', 'eval'), {'__builtins__': {}} | BUILTINS)
+    except Exception:
+        # Errors (such as dividing by zero) are left for runtime.
+        return node
+
+    return ast.Constant(value)
+
+class _CacheAccess(ast.NodeTransformer):
+    """Turns every name into a cache lookup and records the key read.
+    """
+    def __init__(self, reads: set[str]):
+        self.reads: set[str] = reads
+
+    def visit_Call(self, node: ast.Call) -> ast.Call:
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.Subscript:
+        key = node.id.replace('_', ' ')
+        self.reads.add(key)
+        return ast.Subscript(ast.Name('cache', ast.Load()), ast.Constant(key), ast.Load())
@@ -1,73 +1,95 @@
 from __future__ import annotations
 import functions.conditional_function as conditional_function
 import functions.functions as functions
+import functions.expression as expression
 
 class FunctionChain:
     """FunctionChain represents a collection of callable objects.
 
-    FunctionChain represents a collection of callable objects. 
-    Callable objects are called in the order they appear in the 
-    functions list.
+    FunctionChain represents a collection of callable objects.
+    Callable objects are called in the order they appear in the
+    functions list. Every callable object receives the cache that
+    the FunctionChain is called with.
 
     Note:
         return values are ignored because it is unclear which if any
         should be returned
 
     Attributes:
-        function (list[callable[None, None]]): The list of callable
-        objects to be executed.
-    
+        function (tuple[callable[[dict[str, any]], None]]): The
+        callable objects to be executed.
+
     """
-    def __init__(self, *functions: callable[None, None]):
+    __slots__ = ('functions',)
+
+    def __init__(self, *functions: callable[[dict[str, any]], None]):
         """Initializes a FunctionChain with the given callable objects.
 
-        Arguments: 
-            functions (Callable[None, None]): The list of callable
-        objects to be executed.
+        Arguments:
+            functions (callable[[dict[str, any]], None]): The list of
+            callable objects to be executed.
         """
-        self.functions: list[callable[None, None]] = list(functions)
+        self.functions: tuple[callable[[dict[str, any]], None]] = functions
 
-    def __call__(self) -> None:
+    def __call__(self, cache: dict[str, any]) -> None:
         """Executes all callable objects in the order they appear.
 
         Executes all callable objects in the order they appear in the
         functions list. Return values are ignored.
+
+        Args:
+            cache (dict[str, any]): The cache of the fighter
+            triggering this FunctionChain.
         """
         for function in self.functions:
-            function()
+            function(cache)
+
+    def cache_reads(self) -> frozenset[str] | None:
+        """Returns the cache keys this FunctionChain reads.
+
+        Returns:
+            The cache keys read by the functions, or None if they
+            cannot be known in advance or any of them writes to the
+            cache.
+        """
+        return conditional_function._union(*self.functions)
 
     @staticmethod
-    def generate(functions_list: list[dict[str, any]], data: dict[str, any]) -> FunctionChain:
+    def generate(functions_list: list[dict[str, any]]) -> FunctionChain:
         """Generates a FunctionChain from the expected JSON data.
 
         Generates a FunctionChain from the expected JSON data. This
         function will only attempt to create ConditionalFunction(s).
         There may be ConditionalFunction(s) without any condition.
+        Entries written as inline expressions become Expression(s)
+        instead.
 
         Note:
-            A literal parameter of key/name 'cache' is automatically
-            inserted and it stores the data passed into this generate
-            function.
+            A parameter of key/name 'cache' is automatically passed
+            to every function and it stores the cache that the
+            FunctionChain is called with.
 
         Args:
-            functions_list (list[dict[str, any]]): _description_
-            data (dict[str, any]): _description_
+            functions_list (list[dict[str, any]]): The function(s)
+            JSON data to execute in order.
 
         Returns:
-            FunctionChain: _description_
+            FunctionChain: The generated FunctionChain.
         """
         generated_functions = []
 
         for function in functions_list:
-            function['literal parameters']['cache'] = data
+            if 'expr' in function:
+                generated_functions.append(expression.Expression.generate(function))
+                continue
+
             generated_functions.append(
                 conditional_function.ConditionalFunction.generate(
-                    functions.FUNCTIONS[function['function']], 
-                    data,
+                    functions.FUNCTIONS[function['function']],
                     function['inferred parameters'],
                     function['literal parameters'],
                     function['requirements']
                 )
             )
 
-        return FunctionChain(*generated_functions)
\ No newline at end of file
+        return FunctionChain(*generated_functions)
@@ -1,66 +1,102 @@
 from __future__ import annotations
+import copy
+from types import MappingProxyType
 from typing import TypeVar
+import functions.functions as functions
 
 T = TypeVar('T')
 
 class FunctionNode:
     """FunctionNode represents a callable with indirectly pased parameters.
 
-    FunctionNode represents a callable with indirectly pased 
-    parameters. The first callable (function) is supposed to
-    be the primary function, while the second callable
-    (kwarg_getter) should return a dictionary that will be unpacked
-    and passed into the primary function.
+    FunctionNode represents a callable with indirectly pased
+    parameters. The primary function is called with the cache it is
+    invoked with, the inferred parameters (looked up in that cache)
+    and the literal parameters. A FunctionNode does not hold on to
+    any cache, so a single FunctionNode can be shared by every
+    Fighter built from the same template.
+
+    Literal values that can be changed in place (such as lists and
+    dicts) are deep copied on every call, since the function may keep
+    them (set cache stores its value in the cache) or change them.
+    Otherwise every Fighter and thread using the template would share
+    the same object.
 
     Attributes:
         function (callable[..., T]): The primary function (callback).
-        kwarg_getter (callable[None, dict][str, any]): The function 
-        used to obtain the parameters.
+        inferred (MappingProxyType[str, str]): The inferred
+        parameters (the values are the cache keys to look up and the
+        keys are the parameter names).
+        literal (MappingProxyType[str, any]): The literal parameters.
     """
-    def __init__(self, function: callable[..., T], kwarg_getter: callable[None, dict[str, any]]):
-        """Initializes a FunctionNode with the given functions.
+    __slots__ = ('function', 'inferred', 'literal', '__copied')
+
+    def __init__(self, function: callable[..., T], inferred: dict[str, str], literal: dict[str, any]):
+        """Initializes a FunctionNode with the given function and parameters.
 
         Args:
             function (callable[..., T]): The callback.
-            kwarg_getter (callable[None, dict[str, any]]): The 
-            function used to obtain the parameters.
+            inferred (dict[str, str]): The inferred parameters.
+            literal (dict[str, any]): The literal parameters.
         """
         self.function: callable[..., T] = function
-        self.kwarg_getter: callable[None, dict[str, any]] = kwarg_getter
+        self.inferred: MappingProxyType[str, str] = MappingProxyType(dict(inferred))
+        self.literal: MappingProxyType[str, any] = MappingProxyType(copy.deepcopy(dict(literal)))
+        self.__copied: tuple[str] = tuple(
+            key for key, value in self.literal.items() if type(value) not in functions.IMMUTABLE_TYPES
+        )
 
-    def __call__(self) -> T:
+    def __call__(self, cache: dict[str, any]) -> T:
         """Calls the callback and returns its return value.
 
+        Args:
+            cache (dict[str, any]): The cache that inferred parameters
+            are sourced from. It is also passed to the callback as
+            the 'cache' parameter.
+
         Returns:
             The callback's return value.
         """
-        return self.function(**self.kwarg_getter())
-    
+        kwargs = {key: cache[value] for key, value in self.inferred.items()}
+        kwargs['cache'] = cache
+        kwargs.update(self.literal)
+        for key in self.__copied:
+            kwargs[key] = copy.deepcopy(kwargs[key])
+
+        return self.function(**kwargs)
+
+    def cache_reads(self) -> frozenset[str] | None:
+        """Returns the cache keys this FunctionNode reads.
+
+        Returns:
+            The cache keys of the inferred parameters, or None if the
+            function is not pure (see functions.PURE_FUNCTIONS).
+        """
+        if self.function not in functions.PURE_FUNCTIONS:
+            return None
+
+        return frozenset(self.inferred.values())
+
     @staticmethod
-    def generate(function: callable[..., T], data: dict[str, any], inferred: dict[str, str], literal: dict[str, any]) -> FunctionNode:
+    def generate(function: callable[..., T], inferred: dict[str, str], literal: dict[str, any]) -> FunctionNode:
         """Creates a FunctionNode from the expected JSON data.
 
-        Creates a FunctionNode from the expected JSON data. This 
-        method should not be called unless you know what you are 
+        Creates a FunctionNode from the expected JSON data. This
+        method should not be called unless you know what you are
         doing. Instead, use ConditionalFunction. See
         assets/templates/move_template.json for details on what the
-        expected JSON data is. 
+        expected JSON data is.
 
         Args:
             function (callable[..., T]): The primary function.
-            data (dict[str, any]): The dictionary that inferred 
-            parameters are sourced from.
             inferred (dict[str, str]): The inferred parameters
             (inferred's dict values will be used as keys to obtain
-            their new value from data and inferred's dict keys will
-            remain the same) that are passed into the function.
-            literal (dict[str, any]): literal parameters (those that 
-            do not come from data) to pass into the function.
+            their new value from the cache and inferred's dict keys
+            will remain the same) that are passed into the function.
+            literal (dict[str, any]): literal parameters (those that
+            do not come from the cache) to pass into the function.
 
         Returns:
             FunctionNode: The generated FunctionNode.
         """
-        return FunctionNode(
-            function, 
-            lambda : {key: data[value] for key, value in inferred.items()} | literal
-        )
\ No newline at end of file
+        return FunctionNode(function, inferred, literal)
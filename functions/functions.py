@@ -87,6 +87,19 @@ def log(cache: dict[str, any], format: str, **kwargs: dict[str, any]) -> None:
     """
     print(f'[{cache["name"]} log]: {format.format(**kwargs)}')
 
+# Functions that only read their parameters and never write to the
+# cache (or have any other side effect). Only calls to these can be
+# skipped when their parameters did not change. Every registered
+# function writes to the cache (compare writes its result to key) or
+# prints, so none of them are pure. Until one is, only requirements
+# written as expressions without a key can be cached (see
+# Fighter.get_available_moves_mask).
+PURE_FUNCTIONS = frozenset()
+
+# Values that cannot be changed in place, so they can be shared between
+# Fighters (and threads) instead of being copied for each of them.
+IMMUTABLE_TYPES = (int, float, bool, str, type(None))
+
 FUNCTIONS = {
     'set cache': set_cache,
     'add': add,
@@ -104,7 +104,7 @@ if __name__ == '__main__':
 
         #fighter1 attack fighter2
         fighter2_before_hp = fighter2.cache['hp']
-        fighter1.attack(moves[fighter1_move_choice], 0)
+        fighter1.attack_available(moves[fighter1_move_choice], 0)
         console.text.append(f'target has {fighter2.cache["hp"]}/{fighter2.cache["max hp"]} ({fighter2.cache["hp"] - fighter2_before_hp}) hp')
 
         if not is_challenge_active(fighter1, fighter2):
@@ -112,11 +112,11 @@ if __name__ == '__main__':
             break
 
         #get move from pc
-        fighter2_move_choice = randint(0, len(list(fighter2.get_possible_moves())) - 1)
+        fighter2_move_choice = randint(0, len(fighter2.get_possible_moves()) - 1)
 
         #fighter2 attack fighter1
         fighter1_before_hp = fighter1.cache['hp']
-        fighter2.attack(fighter2_move_choice, 0)
+        fighter2.attack_available(fighter2_move_choice, 0)
         console.text.append(f'you have {fighter1.cache["hp"]}/{fighter1.cache["max hp"]} ({fighter1.cache["hp"] - fighter1_before_hp}) hp')
 
         if not is_challenge_active(fighter1, fighter2):
@@ -0,0 +1,198 @@
+from __future__ import annotations
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+import fighter.fighter_template as fighter_template
+import simulation.battle_recorder as battle_recorder
+
+@dataclass(frozen = True, slots = True)
+class BattleResult:
+    """BattleResult represents the outcome of a battle.
+
+    Attributes:
+        winner (str): The name of the winner, or an empty string if
+        there is no winner.
+        turns (int): The number of turns the battle took.
+        hp (tuple[int, int]): The final hp of both fighters.
+    """
+    winner: str
+    turns: int
+    hp: tuple[int, int]
+
+def run_battle(template1: fighter_template.FighterTemplate, template2: fighter_template.FighterTemplate, seed: int, battle_id: int = 0, recorder: battle_recorder.BattleRecorder = None, max_turns: int = 1000, overrides: tuple[dict[str, any], dict[str, any]] = None) -> BattleResult:
+    """Runs a 1v1 battle where both fighters pick random moves.
+
+    Spawns a fighter from each template and makes them attack each
+    other (the first fighter starts) until the challenge ends or the
+    turn limit is reached. Each fighter picks a random move out of
+    its available moves. All randomness comes from a generator
+    seeded for this battle only, and the templates are only read, so
+    any number of battles can run on different threads at once.
+
+    Args:
+        template1 (FighterTemplate): The template of the first
+        fighter.
+        template2 (FighterTemplate): The template of the second
+        fighter.
+        seed (int): The seed of the battle.
+        battle_id (int, optional): The id to record the battle with.
+        Defaults to 0.
+        recorder (BattleRecorder, optional): The recorder to write
+        battle and turn records to.
+        max_turns (int, optional): The most turns to play before the
+        battle is called a draw. Defaults to 1000.
+        overrides (tuple[dict[str, any], dict[str, any]], optional):
+        Cache values to set on the first and second fighter after
+        they are spawned.
+
+    Returns:
+        The result of the battle.
+    """
+    rng = random.Random(seed)
+
+    fighter1 = template1.spawn(rng)
+    fighter2 = template2.spawn(rng)
+    fighter1.challenge_target(fighter2)
+
+    if overrides is not None:
+        fighter1.cache.update(overrides[0])
+        fighter2.cache.update(overrides[1])
+
+    attacker, defender = fighter1, fighter2
+    turn = 0
+
+    while turn < max_turns and fighter1.targets:
+        turn += 1
+
+        mask = attacker.get_available_moves_mask()
+        available_index = rng.randrange(mask.bit_count())
+        move_index = attacker.get_available_move_index(available_index, mask)
+        attacker_before_hp = attacker.cache['hp']
+        defender_before_hp = defender.cache['hp']
+
+        attacker.attack_available(available_index, 0, mask)
+
+        if recorder is not None:
+            recorder.record_turn(
+                battle_id,
+                turn,
+                attacker.cache['name'],
+                attacker.moves[move_index].name,
+                defender.cache['name'],
+                defender_before_hp - defender.cache['hp'],
+                attacker.cache['hp'] - attacker_before_hp
+            )
+
+        attacker, defender = defender, attacker
+
+    if fighter1 and not fighter2:
+        winner = fighter1.cache['name']
+    elif fighter2 and not fighter1:
+        winner = fighter2.cache['name']
+    else:
+        winner = ''
+
+    if recorder is not None:
+        recorder.record_battle(
+            battle_id,
+            seed,
+            fighter1.cache['name'],
+            fighter2.cache['name'],
+            winner,
+            turn
+        )
+
+    return BattleResult(winner, turn, (fighter1.cache['hp'], fighter2.cache['hp']))
+
+@lru_cache(maxsize = None)
+def load_template(path: str) -> fighter_template.FighterTemplate:
+    """Loads a FighterTemplate once per process.
+
+    Args:
+        path (str): The path to the fighter JSON.
+
+    Returns:
+        The loaded FighterTemplate.
+    """
+    return fighter_template.FighterTemplate.load_json(path)
+
+def _simulate_chunk(fighter1_path: str, fighter2_path: str, first_battle_id: int, seeds: list[int], directory: str, batch_size: int, file_format: str) -> int:
+    """Runs a chunk of battles inside a worker process.
+
+    Returns:
+        The number of battles that were run.
+    """
+    template1 = load_template(fighter1_path)
+    template2 = load_template(fighter2_path)
+
+    prefix = f'results-{os.getpid()}-{first_battle_id}'
+    with battle_recorder.BattleRecorder(directory, prefix, batch_size, file_format) as recorder:
+        for battle_id, seed in enumerate(seeds, first_battle_id):
+            run_battle(template1, template2, seed, battle_id, recorder)
+
+    return len(seeds)
+
+def simulate(fighter1_path: str, fighter2_path: str, seeds: list[int], directory: str, workers: int = None, chunk_size: int = 10000, batch_size: int = 65536, file_format: str = None) -> int:
+    """Runs many battles on a process pool and records the results.
+
+    The seeds are split into chunks and each chunk is run by a worker
+    process with its own BattleRecorder, so results are written in
+    batches straight from the workers.
+
+    Args:
+        fighter1_path (str): The path to the first fighter JSON.
+        fighter2_path (str): The path to the second fighter JSON.
+        seeds (list[int]): One seed per battle.
+        directory (str): The directory to write results to.
+        workers (int, optional): The number of worker processes.
+        Defaults to the number of processors.
+        chunk_size (int, optional): The number of battles per task.
+        Defaults to 10000.
+        batch_size (int, optional): The number of buffered rows that
+        triggers a flush. Defaults to 65536.
+        file_format (str, optional): One of 'parquet', 'npz' or
+        'csv'. Defaults to the best available format.
+
+    Returns:
+        The number of battles that were run.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(
+                _simulate_chunk,
+                fighter1_path,
+                fighter2_path,
+                start,
+                seeds[start:start + chunk_size],
+                directory,
+                batch_size,
+                file_format
+            ) for start in range(0, len(seeds), chunk_size)
+        ]
+
+        return sum(future.result() for future in futures)
+
+def run_battles_threaded(template1: fighter_template.FighterTemplate, template2: fighter_template.FighterTemplate, seeds: list[int], workers: int = None) -> list[BattleResult]:
+    """Runs many battles concurrently on a thread pool.
+
+    Every battle spawns its own fighters and uses its own random
+    generator, and the templates are read-only, so battles do not
+    share any mutable state. On free-threaded CPython builds this
+    spreads battles across cores without pickling anything.
+
+    Args:
+        template1 (FighterTemplate): The template of the first
+        fighter.
+        template2 (FighterTemplate): The template of the second
+        fighter.
+        seeds (list[int]): One seed per battle.
+        workers (int, optional): The number of threads. Defaults to
+        the ThreadPoolExecutor default.
+
+    Returns:
+        The result of every battle, in the order of the seeds.
+    """
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(lambda seed: run_battle(template1, template2, seed), seeds))
@@ -0,0 +1,314 @@
+from __future__ import annotations
+import random
+from array import array
+import fighter.fighter as fighter
+import fighter.fighter_template as fighter_template
+
+class BattleEnv:
+    """BattleEnv is a Gym-style environment for a 1v1 battle.
+
+    The agent controls a fighter spawned from one template and fights
+    a fighter spawned from another template that picks random
+    available moves (as in simulation.battle.run_battle). An action
+    is the index of one of the agent's moves; action_mask tells which
+    moves are available. The observation is the value of the chosen
+    cache keys of the agent followed by those of the opponent.
+
+    The reward is 1 when the agent wins, -1 when it loses and 0
+    otherwise. reset and step follow the Gymnasium API.
+
+    Attributes:
+        template (FighterTemplate): The template of the agent.
+        opponent_template (FighterTemplate): The template of the
+        opponent.
+        observation_keys (tuple[str]): The agent's cache keys to
+        observe.
+        opponent_observation_keys (tuple[str]): The opponent's cache
+        keys to observe.
+        max_turns (int): The number of steps after which an episode
+        is truncated.
+        rng (random.Random): The random generator of the episode.
+        agent (Fighter): The agent's fighter.
+        opponent (Fighter): The opponent's fighter.
+        turns (int): The number of steps taken in this episode.
+    """
+    def __init__(self, template: fighter_template.FighterTemplate, opponent_template: fighter_template.FighterTemplate, observation_keys: tuple[str] = ('hp', 'max hp'), opponent_observation_keys: tuple[str] = ('hp', 'max hp'), max_turns: int = 1000):
+        """Initializes a BattleEnv (call reset before stepping).
+
+        Args:
+            template (FighterTemplate): The template of the agent.
+            opponent_template (FighterTemplate): The template of the
+            opponent.
+            observation_keys (tuple[str], optional): The agent's cache
+            keys to observe. Defaults to ('hp', 'max hp').
+            opponent_observation_keys (tuple[str], optional): The
+            opponent's cache keys to observe. Defaults to ('hp',
+            'max hp').
+            max_turns (int, optional): The number of steps after which
+            an episode is truncated. Defaults to 1000.
+        """
+        self.template: fighter_template.FighterTemplate = template
+        self.opponent_template: fighter_template.FighterTemplate = opponent_template
+        self.observation_keys: tuple[str] = tuple(observation_keys)
+        self.opponent_observation_keys: tuple[str] = tuple(opponent_observation_keys)
+        self.max_turns: int = max_turns
+        self.rng: random.Random = random.Random()
+        self.agent: fighter.Fighter = None
+        self.opponent: fighter.Fighter = None
+        self.turns: int = 0
+
+    @property
+    def action_count(self) -> int:
+        """The number of actions (the agent's moves)."""
+        return len(self.template.moves)
+
+    @property
+    def observation_size(self) -> int:
+        """The length of an observation."""
+        return len(self.observation_keys) + len(self.opponent_observation_keys)
+
+    def reset(self, seed: int = None) -> tuple[array, dict[str, any]]:
+        """Starts a new episode.
+
+        Args:
+            seed (int, optional): The seed of the episode.
+
+        Returns:
+            The first observation and an info dict holding the action
+            mask.
+        """
+        self.rng = random.Random(seed)
+        self.agent = self.template.spawn(self.rng)
+        self.opponent = self.opponent_template.spawn(self.rng)
+        self.agent.challenge_target(self.opponent)
+        self.turns = 0
+
+        return self.observation(), {'action_mask': self.action_mask()}
+
+    def step(self, action: int) -> tuple[array, float, bool, bool, dict[str, any]]:
+        """Uses the agent's move and then lets the opponent move.
+
+        Args:
+            action (int): The index of the agent's move.
+
+        Raises:
+            PermissionError: The move is not available. Nothing is
+            changed (not even the turn count).
+
+        Returns:
+            The observation, the reward, whether the episode ended,
+            whether the episode was truncated and an info dict
+            holding the action mask.
+        """
+        if not _is_available(self.agent, action):
+            raise PermissionError(f'Move {action} is not available.')
+
+        self.turns += 1
+        self.agent.attack(action, 0)
+
+        if self.agent.targets:
+            self.opponent.attack(_opponent_action(self.opponent, self.rng), 0)
+
+        terminated = not self.agent.targets
+        truncated = not terminated and self.turns >= self.max_turns
+
+        return self.observation(), _reward(self.agent, self.opponent), terminated, truncated, {'action_mask': self.action_mask()}
+
+    def observation(self) -> array:
+        """Returns the current observation.
+
+        Returns:
+            The observed cache values of the agent and then the
+            opponent.
+        """
+        return array('d', _observe(self.agent.cache, self.observation_keys, self.opponent.cache, self.opponent_observation_keys))
+
+    def action_mask(self) -> list[bool]:
+        """Returns which of the agent's moves are available.
+
+        Returns:
+            One bool per move.
+        """
+        return _mask_list(self.agent)
+
+class VectorBattleEnv:
+    """VectorBattleEnv steps many BattleEnv-like battles per call.
+
+    All battles share the same templates and observation keys.
+    Observations are returned as one flat array (num_envs rows of
+    observation_size values), and the moves of every battle in a
+    step are applied with a single Fighter.apply_moves call for the
+    agents and another for the opponents. Finished battles are
+    reset automatically (the observation returned for them is the
+    first observation of the next episode).
+
+    Attributes:
+        env (BattleEnv): The environment whose settings every battle
+        uses.
+        num_envs (int): The number of battles.
+        rngs (list[random.Random]): The random generator of every
+        battle.
+        fighters (list[Fighter]): The agent and opponent of every
+        battle (agent i is at 2 * i and opponent i at 2 * i + 1).
+        turns (list[int]): The number of steps taken in every battle.
+    """
+    def __init__(self, template: fighter_template.FighterTemplate, opponent_template: fighter_template.FighterTemplate, num_envs: int, **kwargs: dict[str, any]):
+        """Initializes a VectorBattleEnv (call reset before stepping).
+
+        Args:
+            template (FighterTemplate): The template of the agents.
+            opponent_template (FighterTemplate): The template of the
+            opponents.
+            num_envs (int): The number of battles.
+            kwargs (dict[str, any]): Passed to BattleEnv.
+        """
+        self.env: BattleEnv = BattleEnv(template, opponent_template, **kwargs)
+        self.num_envs: int = num_envs
+        self.rngs: list[random.Random] = []
+        self.fighters: list[fighter.Fighter] = []
+        self.turns: list[int] = []
+        self.__seed_rng: random.Random = random.Random()
+
+    def reset(self, seed: int = None) -> tuple[array, dict[str, any]]:
+        """Starts a new episode in every battle.
+
+        Args:
+            seed (int, optional): The seed used to derive the seed of
+            every battle.
+
+        Returns:
+            The observations and an info dict holding the action
+            masks.
+        """
+        self.__seed_rng = random.Random(seed)
+        self.rngs = [None] * self.num_envs
+        self.fighters = [None] * (2 * self.num_envs)
+        self.turns = [0] * self.num_envs
+
+        for index in range(self.num_envs):
+            self.__reset_battle(index)
+
+        return self.observations(), {'action_mask': self.action_masks()}
+
+    def step(self, actions: list[int]) -> tuple[array, array, list[bool], list[bool], dict[str, any]]:
+        """Steps every battle once.
+
+        Args:
+            actions (list[int]): The move index of every agent.
+            Anything with a tolist method is converted with it first.
+
+        Raises:
+            ValueError: There is not exactly one action per battle.
+            PermissionError: A move is not available. Every action is
+            checked before any is applied, so no battle is stepped.
+
+        Returns:
+            The observations, the rewards, whether every battle ended,
+            whether every battle was truncated and an info dict
+            holding the action masks.
+        """
+        if hasattr(actions, 'tolist'):
+            actions = actions.tolist()
+
+        if len(actions) != self.num_envs:
+            raise ValueError(f'Expected {self.num_envs} actions but got {len(actions)}')
+
+        fighters = self.fighters
+
+        for index, action in enumerate(actions):
+            if not _is_available(fighters[2 * index], action):
+                raise PermissionError(f'Move {action} is not available in battle {index}.')
+
+        fighter.Fighter.apply_moves(fighters, [(2 * index, action, 0) for index, action in enumerate(actions)])
+        fighter.Fighter.apply_moves(fighters, [
+            (2 * index + 1, _opponent_action(fighters[2 * index + 1], self.rngs[index]), 0)
+            for index in range(self.num_envs) if fighters[2 * index].targets
+        ])
+
+        rewards = array('d', bytes(8 * self.num_envs))
+        terminated = [False] * self.num_envs
+        truncated = [False] * self.num_envs
+
+        for index in range(self.num_envs):
+            self.turns[index] += 1
+            agent = fighters[2 * index]
+
+            if not agent.targets:
+                rewards[index] = _reward(agent, fighters[2 * index + 1])
+                terminated[index] = True
+            elif self.turns[index] >= self.env.max_turns:
+                truncated[index] = True
+            else:
+                continue
+
+            self.__reset_battle(index)
+
+        return self.observations(), rewards, terminated, truncated, {'action_mask': self.action_masks()}
+
+    def observations(self) -> array:
+        """Returns the current observation of every battle.
+
+        Returns:
+            num_envs rows of observation_size values.
+        """
+        keys, opponent_keys = self.env.observation_keys, self.env.opponent_observation_keys
+        observations = array('d')
+
+        for index in range(self.num_envs):
+            observations.extend(_observe(self.fighters[2 * index].cache, keys, self.fighters[2 * index + 1].cache, opponent_keys))
+
+        return observations
+
+    def action_masks(self) -> list[list[bool]]:
+        """Returns which moves are available to every agent.
+
+        Returns:
+            One list of bools per battle.
+        """
+        return [_mask_list(agent) for agent in self.fighters[::2]]
+
+    def __reset_battle(self, index: int) -> None:
+        """Starts a new episode in one battle.
+        """
+        rng = random.Random(self.__seed_rng.getrandbits(64))
+        agent = self.env.template.spawn(rng)
+        opponent = self.env.opponent_template.spawn(rng)
+        agent.challenge_target(opponent)
+
+        self.rngs[index] = rng
+        self.fighters[2 * index] = agent
+        self.fighters[2 * index + 1] = opponent
+        self.turns[index] = 0
+
+def _opponent_action(opponent: fighter.Fighter, rng: random.Random) -> int:
+    """Returns the index of a random available move of the opponent.
+    """
+    mask = opponent.get_available_moves_mask()
+
+    return rng.choice([index for index in range(len(opponent.moves)) if mask >> index & 1])
+
+def _is_available(agent: fighter.Fighter, action: int) -> bool:
+    """Returns whether an action is the index of an available move of the agent.
+    """
+    return 0 <= action < len(agent.moves) and bool(agent.get_available_moves_mask() >> action & 1)
+
+def _mask_list(agent: fighter.Fighter) -> list[bool]:
+    """Returns one bool per move of the agent telling if it is available.
+    """
+    mask = agent.get_available_moves_mask()
+
+    return [bool(mask >> index & 1) for index in range(len(agent.moves))]
+
+def _observe(cache: dict[str, any], keys: tuple[str], opponent_cache: dict[str, any], opponent_keys: tuple[str]) -> list[float]:
+    """Returns the observed values of both caches.
+    """
+    return [float(cache[key]) for key in keys] + [float(opponent_cache[key]) for key in opponent_keys]
+
+def _reward(agent: fighter.Fighter, opponent: fighter.Fighter) -> float:
+    """Returns 1 if the agent won, -1 if it lost and 0 otherwise.
+    """
+    if agent and not opponent:
+        return 1.0
+    if opponent and not agent:
+        return -1.0
+    return 0.0
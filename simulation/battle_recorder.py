@@ -0,0 +1,166 @@
+from __future__ import annotations
+import csv
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BATTLE_COLUMNS = ('battle', 'seed', 'fighter1', 'fighter2', 'winner', 'turns')
+TURN_COLUMNS = ('battle', 'turn', 'attacker', 'move', 'target', 'damage', 'healing')
+
+FORMATS = ('parquet', 'npz', 'csv')
+
+def default_format() -> str:
+    """Returns the best columnar format available in this environment.
+
+    Returns:
+        'parquet' if pyarrow is installed, 'npz' if numpy is
+        installed and 'csv' otherwise.
+    """
+    if pyarrow is not None:
+        return 'parquet'
+    if numpy is not None:
+        return 'npz'
+    return 'csv'
+
+class BattleRecorder:
+    """BattleRecorder buffers battle results and writes them in columns.
+
+    BattleRecorder keeps one list per column for battle records and
+    turn records. Once either buffer reaches the batch size, both are
+    written to a new pair of chunk files (one for battles and one for
+    turns) in the output directory. Every process should use its own
+    prefix so that chunk files written by different worker processes
+    never collide.
+
+    Attributes:
+        directory (str): The directory that chunk files are written
+        to.
+        prefix (str): The prefix of every chunk file name.
+        batch_size (int): The number of buffered rows that triggers a
+        flush.
+        file_format (str): One of 'parquet', 'npz' or 'csv'.
+        chunks (int): The number of chunks written so far.
+        battles (dict[str, list]): The buffered battle columns.
+        turns (dict[str, list]): The buffered turn columns.
+    """
+    def __init__(self, directory: str, prefix: str = 'results', batch_size: int = 65536, file_format: str = None):
+        """Initializes a BattleRecorder with empty buffers.
+
+        Args:
+            directory (str): The directory that chunk files are
+            written to. It is created if it does not exist.
+            prefix (str, optional): The prefix of every chunk file
+            name. Defaults to 'results'.
+            batch_size (int, optional): The number of buffered rows
+            that triggers a flush. Defaults to 65536.
+            file_format (str, optional): One of 'parquet', 'npz' or
+            'csv'. Defaults to the best available format.
+
+        Raises:
+            ValueError: The file format is unknown or its library is
+            not installed.
+        """
+        file_format = file_format or default_format()
+
+        if file_format not in FORMATS:
+            raise ValueError(f'Unknown file format \'{file_format}\'')
+        if file_format == 'parquet' and pyarrow is None:
+            raise ValueError('The parquet format requires pyarrow')
+        if file_format == 'npz' and numpy is None:
+            raise ValueError('The npz format requires numpy')
+
+        os.makedirs(directory, exist_ok = True)
+
+        self.directory: str = directory
+        self.prefix: str = prefix
+        self.batch_size: int = batch_size
+        self.file_format: str = file_format
+        self.chunks: int = 0
+        self.battles: dict[str, list] = {column: [] for column in BATTLE_COLUMNS}
+        self.turns: dict[str, list] = {column: [] for column in TURN_COLUMNS}
+
+    def __enter__(self) -> BattleRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def record_battle(self, battle: int, seed: int, fighter1: str, fighter2: str, winner: str, turns: int) -> None:
+        """Buffers the result of a battle.
+
+        Args:
+            battle (int): The id of the battle.
+            seed (int): The seed the battle was run with.
+            fighter1 (str): The name of the first fighter.
+            fighter2 (str): The name of the second fighter.
+            winner (str): The name of the winner, or an empty string
+            if there is no winner.
+            turns (int): The number of turns the battle took.
+        """
+        for column, value in zip(BATTLE_COLUMNS, (battle, seed, fighter1, fighter2, winner, turns)):
+            self.battles[column].append(value)
+
+        if len(self.battles['battle']) >= self.batch_size:
+            self.flush()
+
+    def record_turn(self, battle: int, turn: int, attacker: str, move: str, target: str, damage: int, healing: int) -> None:
+        """Buffers a single move used during a battle.
+
+        Args:
+            battle (int): The id of the battle.
+            turn (int): The turn the move was used on.
+            attacker (str): The name of the fighter using the move.
+            move (str): The name of the move.
+            target (str): The name of the target of the move.
+            damage (int): The hp the target lost.
+            healing (int): The hp the attacker gained.
+        """
+        for column, value in zip(TURN_COLUMNS, (battle, turn, attacker, move, target, damage, healing)):
+            self.turns[column].append(value)
+
+        if len(self.turns['battle']) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes every buffered row to a new chunk and clears the buffers.
+        """
+        if not (self.battles['battle'] or self.turns['battle']):
+            return
+
+        self.__write('battles', self.battles)
+        self.__write('turns', self.turns)
+        self.chunks += 1
+
+        for column in self.battles.values():
+            column.clear()
+        for column in self.turns.values():
+            column.clear()
+
+    def __write(self, table: str, columns: dict[str, list]) -> None:
+        """Writes a set of columns to a chunk file.
+
+        Args:
+            table (str): The table name ('battles' or 'turns').
+            columns (dict[str, list]): The columns to write.
+        """
+        path = os.path.join(self.directory, f'{self.prefix}-{table}-{self.chunks:05d}.{self.file_format}')
+
+        match self.file_format:
+            case 'parquet':
+                pyarrow.parquet.write_table(pyarrow.table(columns), path)
+            case 'npz':
+                numpy.savez(path, **{column: numpy.asarray(values) for column, values in columns.items()})
+            case 'csv':
+                with open(path, 'w', newline = '') as file:
+                    writer = csv.writer(file)
+                    writer.writerow(columns)
+                    writer.writerows(zip(*columns.values()))
@@ -0,0 +1,328 @@
+from __future__ import annotations
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import fighter.fighter_template as fighter_template
+import simulation.battle as battle
+
+@dataclass(frozen = True, slots = True)
+class MatchRequest:
+    """MatchRequest represents a queued battle between a player and a monster.
+
+    Attributes:
+        player (str): The template name of the player's fighter.
+        monster (str): The template name of the monster.
+        seed (int): The seed of the battle.
+        submitted (float): When the request was queued
+        (time.perf_counter).
+        future (Future): Resolves to the BattleResult.
+        player_template (FighterTemplate): The template of the
+        player's fighter, resolved when the request was queued.
+        monster_template (FighterTemplate): The template of the
+        monster, resolved when the request was queued.
+    """
+    player: str
+    monster: str
+    seed: int
+    submitted: float
+    future: Future = field(compare = False, repr = False)
+    player_template: fighter_template.FighterTemplate = field(default = None, compare = False, repr = False)
+    monster_template: fighter_template.FighterTemplate = field(default = None, compare = False, repr = False)
+
+@dataclass(frozen = True, slots = True)
+class MatchmakingStats:
+    """MatchmakingStats represents a snapshot of a MatchmakingService.
+
+    Latencies are in seconds and are computed from the most recent
+    battles (see MatchmakingService.history).
+
+    Attributes:
+        queue_depth (int): The number of requests waiting for a batch.
+        in_flight (int): The number of requests queued or running.
+        completed (int): The number of battles that finished.
+        battles_per_second (float): The battles finished per second
+        since the service started.
+        turns_per_second (float): The turns played per second since the
+        service started.
+        turn_p50 (float): The median time a turn took.
+        turn_p99 (float): The 99th percentile of the time a turn took.
+        wait_p50 (float): The median time from submitting a request to
+        its battle starting.
+        wait_p99 (float): The 99th percentile of the time from
+        submitting a request to its battle starting.
+    """
+    queue_depth: int
+    in_flight: int
+    completed: int
+    battles_per_second: float
+    turns_per_second: float
+    turn_p50: float
+    turn_p99: float
+    wait_p50: float
+    wait_p99: float
+
+class MatchmakingService:
+    """MatchmakingService runs queued battles in batches on a thread pool.
+
+    Templates are looked up when a request is submitted, so a
+    template that is removed from templates afterwards (such as by a
+    TemplateRegistry refresh) does not affect queued requests.
+    Requests are grouped by (player template, monster template), and a
+    group is sent to the worker pool as one batch once it holds
+    batch_size requests or its oldest request has waited max_delay
+    seconds, whichever comes first. A batch runs its battles back to
+    back with the same pair of compiled templates. At most max_pending
+    requests may be queued or running at once; submit blocks (back-
+    pressure) until there is room.
+
+    Battles run on threads since templates are read-only and every
+    battle has its own fighters and random generator (see
+    simulation.battle.run_battles_threaded).
+
+    Attributes:
+        templates (dict[str, FighterTemplate]): The templates by name
+        (a TemplateRegistry works too).
+        batch_size (int): The number of requests that fills a batch.
+        max_delay (float): The most seconds a request waits before its
+        batch is sent even if it is not full.
+        max_turns (int): The most turns per battle.
+        history (int): The number of latencies kept for the stats.
+    """
+    def __init__(self, templates: dict[str, fighter_template.FighterTemplate], workers: int = None, batch_size: int = 64, max_delay: float = 0.05, max_pending: int = 10000, max_turns: int = 1000, history: int = 100000):
+        """Initializes a MatchmakingService and starts dispatching.
+
+        Args:
+            templates (dict[str, FighterTemplate]): The templates by
+            name.
+            workers (int, optional): The number of worker threads.
+            Defaults to the ThreadPoolExecutor default.
+            batch_size (int, optional): The number of requests that
+            fills a batch. Defaults to 64.
+            max_delay (float, optional): The most seconds a request
+            waits before its batch is sent. Defaults to 0.05.
+            max_pending (int, optional): The most requests queued or
+            running at once. Defaults to 10000.
+            max_turns (int, optional): The most turns per battle.
+            Defaults to 1000.
+            history (int, optional): The number of latencies kept for
+            the stats. Defaults to 100000.
+
+        Raises:
+            ValueError: batch_size or max_pending is less than 1.
+        """
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError('batch_size and max_pending must be at least 1')
+
+        self.templates: dict[str, fighter_template.FighterTemplate] = templates
+        self.batch_size: int = batch_size
+        self.max_delay: float = max_delay
+        self.max_turns: int = max_turns
+        self.history: int = history
+
+        self.__groups: dict[tuple[fighter_template.FighterTemplate, fighter_template.FighterTemplate], list[MatchRequest]] = {}
+        self.__queued: int = 0
+        self.__in_flight: int = 0
+        self.__max_pending: int = max_pending
+        self.__stopped: bool = False
+        self.__condition: threading.Condition = threading.Condition()
+        self.__seeds: random.Random = random.Random()
+
+        self.__started: float = time.perf_counter()
+        self.__completed: int = 0
+        self.__turns: int = 0
+        self.__turn_latencies: deque[float] = deque(maxlen = history)
+        self.__wait_latencies: deque[float] = deque(maxlen = history)
+
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(workers)
+        self.__dispatcher: threading.Thread = threading.Thread(target = self.__dispatch, daemon = True)
+        self.__dispatcher.start()
+
+    def __enter__(self) -> MatchmakingService:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, player: str, monster: str, seed: int = None, timeout: float = None) -> Future:
+        """Queues a battle between a player and a monster.
+
+        Blocks while max_pending requests are queued or running.
+
+        Args:
+            player (str): The template name of the player's fighter.
+            monster (str): The template name of the monster.
+            seed (int, optional): The seed of the battle. Defaults to
+            a random seed.
+            timeout (float, optional): The most seconds to wait for
+            room in the queue. Defaults to waiting forever.
+
+        Raises:
+            ValueError: There is no template with one of the names.
+            PermissionError: The service is closed.
+            TimeoutError: There was no room in the queue within
+            timeout seconds.
+
+        Returns:
+            A Future that resolves to the BattleResult.
+        """
+        try:
+            player_template = self.templates[player]
+            monster_template = self.templates[monster]
+        except KeyError as error:
+            raise ValueError(f'Unknown template {error}') from None
+
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: self.__stopped or self.__in_flight < self.__max_pending, timeout):
+                raise TimeoutError('The matchmaking queue is full')
+            if self.__stopped:
+                raise PermissionError('The matchmaking service is closed')
+
+            if seed is None:
+                seed = self.__seeds.getrandbits(64)
+
+            request = MatchRequest(player, monster, seed, time.perf_counter(), Future(), player_template, monster_template)
+            self.__groups.setdefault((player_template, monster_template), []).append(request)
+            self.__queued += 1
+            self.__in_flight += 1
+            self.__condition.notify_all()
+
+        return request.future
+
+    def stats(self) -> MatchmakingStats:
+        """Returns a snapshot of the queue, throughput and latencies.
+
+        Returns:
+            The stats.
+        """
+        with self.__condition:
+            elapsed = max(time.perf_counter() - self.__started, 1e-9)
+            turn_latencies = sorted(self.__turn_latencies)
+            wait_latencies = sorted(self.__wait_latencies)
+
+            return MatchmakingStats(
+                self.__queued,
+                self.__in_flight,
+                self.__completed,
+                self.__completed / elapsed,
+                self.__turns / elapsed,
+                _percentile(turn_latencies, 0.5),
+                _percentile(turn_latencies, 0.99),
+                _percentile(wait_latencies, 0.5),
+                _percentile(wait_latencies, 0.99)
+            )
+
+    def close(self) -> None:
+        """Runs every queued request and stops the service.
+
+        Requests submitted after close raise PermissionError.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+
+        self.__dispatcher.join()
+        self.__executor.shutdown()
+
+    def __dispatch(self) -> None:
+        """Sends due batches to the worker pool until the service is closed.
+        """
+        while True:
+            with self.__condition:
+                while True:
+                    now = time.perf_counter()
+                    due = [
+                        key for key, requests in self.__groups.items()
+                        if self.__stopped or len(requests) >= self.batch_size or now - requests[0].submitted >= self.max_delay
+                    ]
+
+                    if due or (self.__stopped and not self.__groups):
+                        break
+
+                    deadline = min((requests[0].submitted + self.max_delay for requests in self.__groups.values()), default = None)
+                    self.__condition.wait(None if deadline is None else max(deadline - now, 0))
+
+                batches = []
+                for key in due:
+                    requests = self.__groups[key]
+                    batches.append((key, requests[:self.batch_size]))
+
+                    if len(requests) > self.batch_size:
+                        self.__groups[key] = requests[self.batch_size:]
+                    else:
+                        del self.__groups[key]
+
+                    self.__queued -= len(batches[-1][1])
+
+                if not batches:
+                    return
+
+            for _, requests in batches:
+                self.__executor.submit(self.__run_batch, requests)
+
+    def __run_batch(self, requests: list[MatchRequest]) -> None:
+        """Runs a batch of battles between the same templates (worker side).
+
+        Every request is released from in_flight and its future is
+        resolved even if something unexpected fails.
+        """
+        timer = _TurnTimer()
+        waits = []
+        turns = 0
+
+        try:
+            for request in requests:
+                if not request.future.set_running_or_notify_cancel():
+                    continue
+
+                timer.last = time.perf_counter()
+                waits.append(timer.last - request.submitted)
+
+                try:
+                    result = battle.run_battle(request.player_template, request.monster_template, request.seed, recorder = timer, max_turns = self.max_turns)
+                except Exception as error:
+                    request.future.set_exception(error)
+                else:
+                    turns += result.turns
+                    request.future.set_result(result)
+        except BaseException as error:
+            for request in requests:
+                if not request.future.done():
+                    if request.future.running() or request.future.set_running_or_notify_cancel():
+                        request.future.set_exception(error)
+            raise
+        finally:
+            with self.__condition:
+                self.__completed += len(waits)
+                self.__turns += turns
+                self.__in_flight -= len(requests)
+                self.__turn_latencies.extend(timer.latencies)
+                self.__wait_latencies.extend(waits)
+                self.__condition.notify_all()
+
+class _TurnTimer:
+    """Stands in for a BattleRecorder and times every turn of a battle.
+    """
+    __slots__ = ('last', 'latencies')
+
+    def __init__(self):
+        self.last: float = time.perf_counter()
+        self.latencies: list[float] = []
+
+    def record_turn(self, *args: tuple) -> None:
+        now = time.perf_counter()
+        self.latencies.append(now - self.last)
+        self.last = now
+
+    def record_battle(self, *args: tuple) -> None:
+        pass
+
+def _percentile(values: list[float], fraction: float) -> float:
+    """Returns a percentile of sorted values (0.0 if there are none).
+    """
+    if not values:
+        return 0.0
+
+    return values[min(int(fraction * len(values)), len(values) - 1)]
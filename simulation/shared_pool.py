@@ -0,0 +1,183 @@
+from __future__ import annotations
+import json
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import fighter.fighter_template as fighter_template
+import simulation.battle as battle
+import analysis.cost_model as cost_model
+import analysis.telemetry as telemetry
+
+RESULT_FIELDS = ('winner', 'turns', 'hp1', 'hp2')
+
+_templates: tuple[fighter_template.FighterTemplate] = ()
+_telemetry: telemetry.Telemetry | None = None
+
+class SharedTemplatePool:
+    """SharedTemplatePool runs battles on worker processes that share templates.
+
+    The fighter JSON of every template is written once into a
+    multiprocessing.shared_memory block. Each worker process reads
+    the block when it starts and compiles every template a single
+    time, so compiled templates (and the closures inside them) are
+    never pickled. Tasks are small (template1 id, template2 id, seed,
+    overrides) tuples sent in batches, and every batch comes back as
+    one flat array of integers (see RESULT_FIELDS) instead of one
+    object per battle.
+
+    With counters, every worker instruments its templates (see
+    analysis.telemetry) and sends the counts it gathered along with
+    every batch, so the counts of all workers add up in counters.
+
+    Attributes:
+        names (tuple[str]): The name of every template, by id.
+        counters (Telemetry | None): The counts of every worker.
+        memory (SharedMemory): The block holding the fighter JSON.
+        executor (ProcessPoolExecutor): The worker processes.
+    """
+    def __init__(self, data: list[dict[str, any]], workers: int = None, counters: telemetry.Telemetry = None):
+        """Initializes a SharedTemplatePool and starts its workers.
+
+        Args:
+            data (list[dict[str, any]]): The fighter JSON of every
+            template. The template id is the index in this list.
+            workers (int, optional): The number of worker processes.
+            Defaults to the number of processors.
+            counters (Telemetry, optional): The telemetry to add the
+            counts of the workers to.
+
+        Raises:
+            ValueError: A template is nested too deeply to compile
+            (see cost_model.check_nesting), or two templates have the
+            same name and counters is given (the counts are kept by
+            template name).
+        """
+        names = tuple(template['name'] for template in data)
+        if counters is not None and len(set(names)) != len(names):
+            raise ValueError('Templates counted in telemetry must have unique names')
+
+        # Templates are compiled by the workers, so content they would
+        # fail on is rejected here instead.
+        for template in data:
+            cost_model.check_nesting(template, f'\'{template["name"]}\'')
+
+        bundle = json.dumps(data).encode()
+
+        self.names: tuple[str] = names
+        self.counters: telemetry.Telemetry | None = counters
+        self.memory: shared_memory.SharedMemory = shared_memory.SharedMemory(create = True, size = max(len(bundle), 1))
+        self.memory.buf[:len(bundle)] = bundle
+        self.executor: ProcessPoolExecutor = ProcessPoolExecutor(
+            workers,
+            initializer = _load_templates,
+            initargs = (self.memory.name, len(bundle), counters is not None)
+        )
+
+    @staticmethod
+    def load_json(paths: list[str], workers: int = None, counters: telemetry.Telemetry = None) -> SharedTemplatePool:
+        """Creates a SharedTemplatePool from fighter JSON files.
+
+        Args:
+            paths (list[str]): The path of every template. The
+            template id is the index in this list.
+            workers (int, optional): The number of worker processes.
+            Defaults to the number of processors.
+            counters (Telemetry, optional): The telemetry to add the
+            counts of the workers to.
+
+        Returns:
+            The created SharedTemplatePool.
+        """
+        data = []
+        for path in paths:
+            with open(path, 'r') as file:
+                data.append(json.load(file))
+
+        return SharedTemplatePool(data, workers, counters)
+
+    def __enter__(self) -> SharedTemplatePool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run(self, tasks: list[tuple[int, int, int, tuple]], batch_size: int = 1024) -> array:
+        """Runs battles on the worker processes.
+
+        Args:
+            tasks (list[tuple[int, int, int, tuple]]): One (template1
+            id, template2 id, seed, overrides) tuple per battle, where
+            overrides is either empty or a pair of ((key, value), ...)
+            tuples applied to the first and second fighter's cache.
+            batch_size (int, optional): The number of tasks sent to a
+            worker at once. Defaults to 1024.
+
+        Returns:
+            A flat array with len(RESULT_FIELDS) integers per battle,
+            in the order of the tasks. The winner is 0 or 1 (the
+            index of the winning fighter) or -1 if there is no winner.
+        """
+        futures = [
+            self.executor.submit(_run_tasks, tasks[start:start + batch_size])
+            for start in range(0, len(tasks), batch_size)
+        ]
+
+        results = array('q')
+        for future in futures:
+            data, snapshot = future.result()
+            results.frombytes(data)
+
+            if snapshot is not None and self.counters is not None:
+                self.counters.merge(snapshot)
+
+        return results
+
+    def close(self) -> None:
+        """Stops the workers and frees the shared memory block.
+        """
+        self.executor.shutdown()
+        self.memory.close()
+        self.memory.unlink()
+
+def _load_templates(memory_name: str, size: int, counted: bool) -> None:
+    """Compiles every template from the shared memory block (worker side).
+    """
+    global _templates, _telemetry
+
+    memory = shared_memory.SharedMemory(memory_name)
+    try:
+        data = json.loads(bytes(memory.buf[:size]))
+    finally:
+        memory.close()
+
+    _telemetry = telemetry.Telemetry() if counted else None
+    _templates = tuple(fighter_template.FighterTemplate.generate(template, counters = _telemetry) for template in data)
+
+def _run_tasks(tasks: list[tuple[int, int, int, tuple]]) -> tuple[bytes, dict | None]:
+    """Runs a batch of tasks (worker side).
+
+    Returns:
+        The results of the batch as the bytes of an array('q') and
+        the counts gathered since the last batch (see
+        Telemetry.drain), or None without telemetry.
+    """
+    results = array('q')
+
+    for template1_id, template2_id, seed, overrides in tasks:
+        result = battle.run_battle(
+            _templates[template1_id],
+            _templates[template2_id],
+            seed,
+            overrides = (dict(overrides[0]), dict(overrides[1])) if overrides else None
+        )
+
+        if result.hp[0] > 0 and result.hp[1] <= 0:
+            winner = 0
+        elif result.hp[1] > 0 and result.hp[0] <= 0:
+            winner = 1
+        else:
+            winner = -1
+
+        results.extend((winner, result.turns, result.hp[0], result.hp[1]))
+
+    return results.tobytes(), None if _telemetry is None else _telemetry.drain()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import contextlib
+import io
+import sys
+import fighter.fighter_template as fighter_template
+import simulation.battle as battle
+
+def check_thread_isolation(template1: fighter_template.FighterTemplate, template2: fighter_template.FighterTemplate, battles: int = 5000, workers: int = 64, switch_interval: float = 1e-6) -> list[int]:
+    """Checks that battles run on threads match the same battles run serially.
+
+    Runs the same seeded battles serially and then on a thread pool
+    (with a tiny thread switch interval so that threads interleave as
+    much as possible) and compares the results.
+
+    Args:
+        template1 (FighterTemplate): The template of the first
+        fighter.
+        template2 (FighterTemplate): The template of the second
+        fighter.
+        battles (int, optional): The number of battles. Defaults to
+        5000.
+        workers (int, optional): The number of threads. Defaults to
+        64.
+        switch_interval (float, optional): The thread switch interval
+        to use while the threads run. Defaults to 1e-6.
+
+    Returns:
+        The seeds of the battles whose results did not match.
+    """
+    seeds = list(range(battles))
+    serial = [battle.run_battle(template1, template2, seed) for seed in seeds]
+
+    previous_interval = sys.getswitchinterval()
+    sys.setswitchinterval(switch_interval)
+    try:
+        threaded = battle.run_battles_threaded(template1, template2, seeds, workers)
+    finally:
+        sys.setswitchinterval(previous_interval)
+
+    return [seed for seed, expected, actual in zip(seeds, serial, threaded) if expected != actual]
+
+if __name__ == '__main__':
+    template1 = fighter_template.FighterTemplate.load_json('assets/data/monsters/dummy1.json')
+    template2 = fighter_template.FighterTemplate.load_json('assets/data/monsters/dummy2.json')
+
+    # The monsters log every powered up hit, which is not useful here.
+    with contextlib.redirect_stdout(io.StringIO()):
+        mismatches = check_thread_isolation(template1, template2)
+
+    print(f'{len(mismatches)} mismatched battles' + (f' (seeds: {mismatches[:10]})' if mismatches else ''))
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,63 @@
+import unittest
+import fighter.fighter_template as fighter_template
+import simulation.battle_env as battle_env
+
+def _move(name: str, requirements: list) -> dict[str, any]:
+    return {
+        'name': name,
+        'effects': [{
+            'effect': 'damage target',
+            'inferred parameters': {},
+            'literal parameters': {'min_damage': 1, 'max_damage': 1},
+            'requirements': [],
+            'pre effect': [],
+            'post effect': []
+        }],
+        'requirements': requirements
+    }
+
+def _template() -> fighter_template.FighterTemplate:
+    return fighter_template.FighterTemplate.generate({
+        'name': 'template',
+        'presets': [],
+        'max health': 100,
+        'moves': [_move('Hit', []), _move('Never', [[{'expr': 'hp < 0'}]])],
+        'cache': {},
+        'post init': []
+    })
+
+class TestBattleEnv(unittest.TestCase):
+    def test_invalid_actions_change_nothing(self):
+        env = battle_env.BattleEnv(_template(), _template())
+        observation, _ = env.reset(seed = 0)
+
+        for action in (1, -1, 2):
+            with self.subTest(action = action), self.assertRaises(PermissionError):
+                env.step(action)
+
+        self.assertEqual(env.turns, 0)
+        self.assertEqual(env.observation(), observation)
+
+class TestVectorBattleEnv(unittest.TestCase):
+    def test_wrong_number_of_actions_steps_no_battle(self):
+        env = battle_env.VectorBattleEnv(_template(), _template(), 3)
+        observations, _ = env.reset(seed = 0)
+
+        with self.assertRaises(ValueError):
+            env.step([0])
+
+        self.assertEqual(env.turns, [0, 0, 0])
+        self.assertEqual(env.observations(), observations)
+
+    def test_unavailable_action_steps_no_battle(self):
+        env = battle_env.VectorBattleEnv(_template(), _template(), 2)
+        observations, _ = env.reset(seed = 0)
+
+        with self.assertRaises(PermissionError):
+            env.step([0, 1])
+
+        self.assertEqual(env.turns, [0, 0])
+        self.assertEqual(env.observations(), observations)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import analysis.cost_model as cost_model
+import fighter.fighter_template as fighter_template
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+MONSTERS = os.path.join(ROOT, 'assets', 'data', 'monsters')
+
+def _deep_fighter(levels: int) -> dict[str, any]:
+    requirements = []
+    for _ in range(levels):
+        requirements = [[{
+            'function': 'log',
+            'inferred parameters': {},
+            'literal parameters': {'format': 'deep'},
+            'requirements': requirements
+        }]]
+
+    with open(os.path.join(MONSTERS, 'dummy1.json'), 'r') as file:
+        data = json.load(file)
+    data['moves'][0]['requirements'] = requirements
+
+    return data
+
+class TestCostModel(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'deep.json')
+
+        with open(self.path, 'w') as file:
+            json.dump(_deep_fighter(250), file)
+
+    def test_check_nesting(self):
+        cost_model.check_nesting([[[]]], 'shallow')
+        cost_model.check_nesting(_deep_fighter(10), 'dummy')
+
+        with self.assertRaises(ValueError):
+            cost_model.check_nesting(_deep_fighter(250), 'deep')
+
+    def test_deep_templates_are_rejected_with_value_error(self):
+        with self.assertRaises(ValueError):
+            fighter_template.FighterTemplate.load_json(self.path, cost_model.CostBudget(depth = 20))
+
+    def test_cli_checks_every_file(self):
+        process = subprocess.run(
+            [sys.executable, '-m', 'analysis.cost_model', self.path, os.path.join(MONSTERS, 'dummy2.json'), '--depth', '20'],
+            cwd = ROOT,
+            capture_output = True,
+            text = True
+        )
+
+        self.assertEqual(process.returncode, 1)
+        self.assertIn('nested deeper', process.stdout)
+        self.assertIn('dummy2.json (goober2)', process.stdout)
+        self.assertNotIn('Traceback', process.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
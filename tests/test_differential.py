@@ -0,0 +1,9 @@
+import unittest
+import analysis.differential as differential
+
+class TestDifferential(unittest.TestCase):
+    def test_every_engine_matches_the_reference(self):
+        self.assertEqual(differential.check(cases = 20, turns = 100), [])
+
+if __name__ == '__main__':
+    unittest.main()
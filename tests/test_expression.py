@@ -0,0 +1,52 @@
+import unittest
+import functions.expression as expression
+
+def _constants(compiled: expression.Expression) -> tuple:
+    return compiled.function.__code__.co_consts
+
+class TestExpression(unittest.TestCase):
+    def test_names_read_cache_keys_with_spaces(self):
+        compiled = expression.Expression('hp <= max_hp - 100')
+
+        self.assertEqual(compiled.reads, frozenset(('hp', 'max hp')))
+        self.assertTrue(compiled({'hp': 100, 'max hp': 200}))
+        self.assertFalse(compiled({'hp': 101, 'max hp': 200}))
+
+    def test_constant_subexpressions_are_folded(self):
+        compiled = expression.Expression('hp > 1 + 2 * 3 and true')
+
+        self.assertIn(7, _constants(compiled))
+        self.assertNotIn(3, _constants(compiled))
+        self.assertTrue(compiled({'hp': 8}))
+        self.assertEqual(expression.Expression('max(2, 5) - abs(-1)')({}), 4)
+
+    def test_growing_str_operations_are_not_folded(self):
+        compiled = expression.Expression("'a' * 50000000 == name")
+
+        self.assertTrue(all(len(constant) < 100 for constant in _constants(compiled) if isinstance(constant, str)))
+        self.assertEqual(expression.Expression("'%05d' % 7")({}), '00007')
+
+    def test_errors_are_left_for_run_time(self):
+        compiled = expression.Expression('1 // 0')
+
+        with self.assertRaises(ZeroDivisionError):
+            compiled({})
+
+    def test_key_stores_the_result(self):
+        compiled = expression.Expression('hp * 2', 'double hp')
+        cache = {'hp': 4}
+
+        self.assertEqual(compiled(cache), 8)
+        self.assertEqual(cache['double hp'], 8)
+
+    def test_cache_reads(self):
+        self.assertEqual(expression.Expression('hp < max_hp').cache_reads(), frozenset(('hp', 'max hp')))
+        self.assertIsNone(expression.Expression('hp < max_hp', 'low').cache_reads())
+
+    def test_unsupported_syntax_is_rejected(self):
+        for source in ('cache.clear()', 'hp.real', 'moves[0]', 'max(hp, key = abs)', 'open(name)', '__import__(name)', 'hp ** 2', 'lambda: 1', 'hp <'):
+            with self.subTest(source = source), self.assertRaises(ValueError):
+                expression.Expression(source)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import fighter.fighter as fighter
+import fighter.fighter_template as fighter_template
+
+def _template(name: str, max_hp: int, requirements: list = None) -> fighter_template.FighterTemplate:
+    return fighter_template.FighterTemplate.generate({
+        'name': name,
+        'presets': [],
+        'max health': max_hp,
+        'moves': [{
+            'name': 'Hit',
+            'effects': [{
+                'effect': 'damage target',
+                'inferred parameters': {},
+                'literal parameters': {'min_damage': 5, 'max_damage': 5},
+                'requirements': [],
+                'pre effect': [],
+                'post effect': []
+            }],
+            'requirements': requirements or []
+        }],
+        'cache': {},
+        'post init': []
+    })
+
+LOW_HP = [[{'expr': 'hp < 5'}]]
+
+class TestFighter(unittest.TestCase):
+    def test_apply_moves_skips_only_commands_of_ended_challenges(self):
+        weak = _template('weak', 5)
+        strong = _template('strong', 100)
+        fighters = [strong.spawn(), weak.spawn(), strong.spawn(), strong.spawn()]
+        fighters[0].challenge_target(fighters[1])
+        fighters[2].challenge_target(fighters[3])
+
+        results = fighter.Fighter.apply_moves(fighters, [(0, 0, 0), (1, 0, 0), (2, 0, 0), (0, 0, 0)])
+
+        self.assertEqual(list(results), [5, fighter.SKIPPED, 5, fighter.SKIPPED])
+        self.assertEqual(fighters[3].cache['hp'], 95)
+
+    def test_available_moves_mask_follows_the_keys_it_reads(self):
+        attacker = _template('attacker', 100, LOW_HP).spawn()
+
+        attacker.cache['hp'] = 3
+        self.assertEqual(attacker.get_available_moves_mask(), 1)
+        attacker.cache['hp'] = 9
+        self.assertEqual(attacker.get_available_moves_mask(), 0)
+        attacker.cache['hp'] = 4
+        self.assertEqual(attacker.get_available_moves_mask(), 1)
+
+    def test_requirements_that_write_are_never_cached(self):
+        attacker = _template('attacker', 100, [[{'expr': 'hp < 5', 'key': 'low'}]]).spawn()
+
+        attacker.cache['hp'] = 3
+        self.assertEqual(attacker.get_available_moves_mask(), 1)
+        del attacker.cache['low']
+        self.assertEqual(attacker.get_available_moves_mask(), 1)
+        self.assertIs(attacker.cache['low'], True)
+
+    def test_attack_available_checks_a_stale_mask(self):
+        attacker = _template('attacker', 100, LOW_HP).spawn()
+        target = _template('target', 100).spawn()
+        attacker.challenge_target(target)
+
+        attacker.cache['hp'] = 3
+        mask = attacker.get_available_moves_mask()
+        attacker.cache['hp'] = 9
+
+        with self.assertRaises(PermissionError):
+            attacker.attack_available(0, 0, mask)
+        self.assertEqual(target.cache['hp'], 100)
+
+        attacker.cache['hp'] = 4
+        attacker.attack_available(0, 0, attacker.get_available_moves_mask())
+        self.assertEqual(target.cache['hp'], 95)
+
+if __name__ == '__main__':
+    unittest.main()
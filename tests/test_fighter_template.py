@@ -0,0 +1,54 @@
+import unittest
+import fighter.fighter_template as fighter_template
+
+class TestFighterTemplate(unittest.TestCase):
+    def test_spawned_fighters_do_not_share_cache_values(self):
+        data = {
+            'name': 'template',
+            'presets': [],
+            'max health': 10,
+            'moves': [],
+            'cache': {'items': [1, 2], 'stats': {'level': 1}},
+            'post init': []
+        }
+        template = fighter_template.FighterTemplate.generate(data)
+
+        first = template.spawn()
+        first.cache['items'].append(3)
+        first.cache['stats']['level'] = 2
+        second = template.spawn()
+
+        self.assertEqual(second.cache['items'], [1, 2])
+        self.assertEqual(second.cache['stats'], {'level': 1})
+        self.assertEqual(template.cache['items'], [1, 2])
+
+        data['cache']['items'].append(4)
+        self.assertEqual(template.spawn().cache['items'], [1, 2])
+
+    def test_spawned_fighters_do_not_share_literal_parameters(self):
+        data = {
+            'name': 'template',
+            'presets': [],
+            'max health': 10,
+            'moves': [],
+            'cache': {},
+            'post init': [{
+                'function': 'set cache',
+                'inferred parameters': {},
+                'literal parameters': {'key': 'items', 'value': [1, 2]},
+                'requirements': []
+            }]
+        }
+        template = fighter_template.FighterTemplate.generate(data)
+
+        first = template.spawn()
+        first.cache['items'].append(3)
+        second = template.spawn()
+
+        self.assertEqual(second.cache['items'], [1, 2])
+
+        data['post init'][0]['literal parameters']['value'].append(4)
+        self.assertEqual(template.spawn().cache['items'], [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
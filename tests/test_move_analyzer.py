@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+import analysis.move_analyzer as move_analyzer
+import effects.effect_node as effect_node
+import effects.effects as effects
+import fighter.move as move
+
+class _DamagePower(effect_node.EffectNode):
+    """Removes the caster's power from the target's hp (no outcomes)."""
+    __slots__ = ()
+
+    def __call__(self, target: dict[str, any]) -> None:
+        target['hp'] -= self.cache['power']
+
+def _add_power(amount: int) -> dict[str, any]:
+    return {
+        'function': 'add',
+        'inferred parameters': {'lhs': 'power'},
+        'literal parameters': {'key': 'power', 'rhs': amount},
+        'requirements': []
+    }
+
+class TestMoveAnalyzer(unittest.TestCase):
+    def test_sampled_moves_run_every_effect_once(self):
+        with mock.patch.dict(effects.EFFECTS, {'damage power': _DamagePower}):
+            sampled_move = move.Move.generate('Power', [{
+                'effect': 'damage power',
+                'inferred parameters': {},
+                'literal parameters': {},
+                'requirements': [],
+                'pre effect': [_add_power(10)],
+                'post effect': [_add_power(100)]
+            }], [])
+
+        caster = {'hp': 10, 'max hp': 10, 'power': 1}
+        target = {'hp': 50}
+        outcome = move_analyzer.MoveAnalyzer(samples = 10, seed = 0).analyze(sampled_move, caster, target)
+
+        self.assertFalse(outcome.exact)
+        self.assertEqual(outcome.outcomes, {(11, 0): 1.0})
+        self.assertEqual(caster['power'], 1)
+        self.assertEqual(target['hp'], 50)
+
+    def test_later_effect_groups_see_the_hp_left_by_earlier_ones(self):
+        heal = {
+            'effect': 'heal self',
+            'inferred parameters': {},
+            'literal parameters': {'heal_amount': 10},
+            'requirements': [],
+            'pre effect': [],
+            'post effect': []
+        }
+        double_heal = move.Move.generate('Double Heal', [heal, heal], [])
+
+        caster = {'hp': 95, 'max hp': 100}
+        outcome = move_analyzer.MoveAnalyzer().analyze(double_heal, caster, {'hp': 50})
+
+        self.assertTrue(outcome.exact)
+        self.assertEqual(outcome.outcomes, {(0, 5): 1.0})
+        self.assertEqual(caster['hp'], 95)
+
+if __name__ == '__main__':
+    unittest.main()
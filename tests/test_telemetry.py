@@ -0,0 +1,55 @@
+import unittest
+import analysis.telemetry as telemetry
+import fighter.fighter_template as fighter_template
+import fighter.move as move
+
+HIT = {
+    'name': 'Hit',
+    'effects': [{
+        'effect': 'damage target',
+        'inferred parameters': {},
+        'literal parameters': {'min_damage': 1, 'max_damage': 1},
+        'requirements': [],
+        'pre effect': [],
+        'post effect': []
+    }],
+    'requirements': [[{'expr': 'hp > 0'}]]
+}
+
+def _data(name: str) -> dict[str, any]:
+    return {
+        'name': name,
+        'presets': ['hit'],
+        'max health': 10,
+        'moves': [{'preset': 'hit'}],
+        'cache': {},
+        'post init': []
+    }
+
+class TestTelemetry(unittest.TestCase):
+    def test_duplicate_template_names_are_rejected(self):
+        counters = telemetry.Telemetry()
+        presets = {'hit': move.Move.generate(HIT['name'], HIT['effects'], HIT['requirements'])}
+        fighter_template.FighterTemplate.generate(_data('first'), counters = counters, presets = presets)
+
+        with self.assertRaises(ValueError):
+            fighter_template.FighterTemplate.generate(_data('first'), counters = counters, presets = presets)
+
+    def test_shared_presets_are_counted_per_template(self):
+        counters = telemetry.Telemetry()
+        preset = move.Move.generate(HIT['name'], HIT['effects'], HIT['requirements'])
+        first = fighter_template.FighterTemplate.generate(_data('first'), counters = counters, presets = {'hit': preset})
+        second = fighter_template.FighterTemplate.generate(_data('second'), counters = counters, presets = {'hit': preset})
+
+        attacker, target = first.spawn(), second.spawn()
+        attacker.challenge_target(target)
+        attacker.attack(0, 0)
+
+        counts = {(name, metric): value for name, metric, _, value in counters.counts()}
+        self.assertEqual(counts[('first', 'move_uses')], 1)
+        self.assertEqual(counts[('second', 'move_uses')], 0)
+        self.assertIsNone(preset.counters)
+        self.assertIsNone(preset.requirement.counters)
+
+if __name__ == '__main__':
+    unittest.main()
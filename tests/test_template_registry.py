@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import analysis.cost_model as cost_model
+import fighter.template_registry as template_registry
+
+MONSTERS = os.path.join(os.path.dirname(__file__), '..', 'assets', 'data', 'monsters')
+
+class TestTemplateRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_deeply_nested_template_is_recorded_as_an_error(self):
+        shutil.copy(os.path.join(MONSTERS, 'dummy1.json'), self.directory)
+
+        requirements = []
+        for _ in range(300):
+            requirements = [[{
+                'function': 'log',
+                'inferred parameters': {},
+                'literal parameters': {'format': 'deep'},
+                'requirements': requirements
+            }]]
+
+        with open(os.path.join(MONSTERS, 'dummy1.json'), 'r') as file:
+            data = json.load(file)
+        data['post init'] = [{
+            'function': 'log',
+            'inferred parameters': {},
+            'literal parameters': {'format': 'deep'},
+            'requirements': requirements
+        }]
+        with open(os.path.join(self.directory, 'deep.json'), 'w') as file:
+            json.dump(data, file)
+
+        registry = template_registry.TemplateRegistry(self.directory, cost_model.CostBudget(depth = 20))
+
+        self.assertIn('dummy1', registry)
+        self.assertNotIn('deep', registry)
+        self.assertIsInstance(registry.errors['deep'], ValueError)
+
+if __name__ == '__main__':
+    unittest.main()
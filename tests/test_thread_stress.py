@@ -0,0 +1,22 @@
+import contextlib
+import io
+import os
+import unittest
+import fighter.fighter_template as fighter_template
+import simulation.thread_stress as thread_stress
+
+MONSTERS = os.path.join(os.path.dirname(__file__), '..', 'assets', 'data', 'monsters')
+
+class TestThreadStress(unittest.TestCase):
+    def test_threaded_battles_match_serial_battles(self):
+        template1 = fighter_template.FighterTemplate.load_json(os.path.join(MONSTERS, 'dummy1.json'))
+        template2 = fighter_template.FighterTemplate.load_json(os.path.join(MONSTERS, 'dummy2.json'))
+
+        # The monsters log every powered up hit, which is not useful here.
+        with contextlib.redirect_stdout(io.StringIO()):
+            mismatches = thread_stress.check_thread_isolation(template1, template2, battles = 500, workers = 16)
+
+        self.assertEqual(mismatches, [])
+
+if __name__ == '__main__':
+    unittest.main()